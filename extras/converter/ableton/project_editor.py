@@ -1,18 +1,107 @@
+import copy
 import gzip
-import xml.etree.ElementTree as ET
+import io
+import logging
 from pathlib import Path
-from typing import List, Optional, Dict, Tuple
-import copy
+from typing import Iterator, List, Optional, Dict, Tuple
 import shutil
-import re
+from contextlib import contextmanager
+from xml.sax.saxutils import escape
 
+from lxml import etree
+
+from common import normalize_name
 from models import Marker, TempoChange, TimeSignatureChange
 from audio import AudioFileMapper
 
+logger = logging.getLogger(__name__)
+
+XML_DECLARATION = b'<?xml version="1.0" encoding="UTF-8"?>\n'
+
+# Level 6 is much cheaper than gzip's default of 9 for a few percent in size
+GZIP_COMPRESS_LEVEL = 6
+# Large buffers keep zlib working on big chunks instead of 8 KB slices
+GZIP_BUFFER_SIZE = 256 * 1024
+
+# The project and every clip fragment are parsed with the same parser so they
+# share one name dictionary; appending a fragment into the project then only
+# relinks its nodes instead of re-interning every tag and attribute name.
+# Live projects use no DTDs, entities or xml:id attributes, so those features
+# are switched off to skip the ID hash table and any entity expansion
+_XML_PARSER = etree.XMLParser(
+    resolve_entities=False, collect_ids=False, no_network=True
+)
+
+# Precompiled XPath expressions for the hot lookups. Live sets have a fixed
+# schema, so each one spells out the child path instead of searching the
+# whole subtree with ".//"
+_XP_AUTOMATION_ENVELOPES = etree.XPath("AutomationEnvelope")
+_XP_POINTEE_ID = etree.XPath("EnvelopeTarget/PointeeId")
+_XP_LOOP = etree.XPath("Loop")
+_XP_NOTES = etree.XPath("Notes")
+_XP_NAME = etree.XPath("Name")
+_XP_EFFECTIVE_NAME = etree.XPath("Name/EffectiveName")
+_XP_ARRANGER_EVENTS = etree.XPath(
+    "DeviceChain/MainSequencer/ClipTimeable/ArrangerAutomation/Events"
+)
+_XP_MIDI_CLIPS = etree.XPath(
+    "DeviceChain/MainSequencer/ClipTimeable/ArrangerAutomation/Events/MidiClip"
+)
+_XP_SAMPLE_EVENTS = etree.XPath(
+    "DeviceChain/MainSequencer/Sample/ArrangerAutomation/Events"
+)
+_XP_AUDIO_CLIPS = etree.XPath(
+    "DeviceChain/MainSequencer/Sample/ArrangerAutomation/Events/AudioClip"
+)
+_XP_MASTER_ENVELOPES = etree.XPath("AutomationEnvelopes/Envelopes")
+_XP_EVENTS = etree.XPath("Automation/Events")
+_XP_CURRENT_END = etree.XPath("CurrentEnd")
+_XP_FILE_REF = etree.XPath("SampleRef/FileRef")
+
+
+@contextmanager
+def _open_als(als_file: Path) -> Iterator[gzip.GzipFile]:
+    """Open a gzipped .als file for reading through a large read buffer"""
+    with open(als_file, "rb", buffering=GZIP_BUFFER_SIZE) as raw:
+        with gzip.GzipFile(fileobj=raw, mode="rb") as f:
+            yield f
+
+
+def _first(
+    xpath: etree.XPath, element: etree._Element
+) -> Optional[etree._Element]:
+    """Return the first match of a precompiled XPath, like element.find()"""
+    matches = xpath(element)
+    return matches[0] if matches else None
+
+
+# Placeholder tokens substituted into the clip format templates
+_CLIP_PLACEHOLDERS = {
+    "clip_id": "__CLIP_ID__",
+    "time": "__TIME__",
+    "end": "__END__",
+    "duration": "__DURATION__",
+    "name": "__NAME__",
+}
+# Direct children of a clip that carry per-clip values, and the placeholder
+# each one receives
+_CLIP_CHILD_FIELDS = {
+    "LomId": "clip_id",
+    "LomIdView": "clip_id",
+    "CurrentStart": "time",
+    "CurrentEnd": "end",
+    "Name": "name",
+}
+_ATTR_ENTITIES = {'"': "&quot;", "\n": "&#10;", "\t": "&#9;"}
+
 
 class AbletonProjectEditor:
     """Edits Ableton Live .als project files"""
 
+    # Master track automation targets (PointeeId values)
+    POINTEE_TEMPO = 8
+    POINTEE_TIME_SIGNATURE = 10
+
     def __init__(self, als_file: Path):
         self.als_file = als_file
         self.tree = None
@@ -23,16 +112,53 @@ class AbletonProjectEditor:
         self.osc_clips_container = None
         self.audio_tracks = {}
         self.template_audio_clip = None
+        self._clip_template = None
+        self._osc_clip_template = None
+        self._template_audio_clip_bytes = None
+        self._envelopes_by_pointee = None
+        self._first_midi_clip = None
+        self._midi_tracks_by_name: Dict[str, etree._Element] = {}
+        self._audio_tracks_by_name: Dict[str, etree._Element] = {}
+        self._master_track = None
+        self._master_envelopes_container = None
+
+    @staticmethod
+    def read_xml(als_file: Path) -> bytes:
+        """Read the decompressed XML content of an .als file"""
+        with _open_als(als_file) as f:
+            return f.read()
+
+    @staticmethod
+    def parse_xml(content: bytes) -> etree._ElementTree:
+        """Parse decompressed .als XML into a tree that load() can copy"""
+        return etree.ElementTree(etree.fromstring(content, _XML_PARSER))
+
+    def load(
+        self,
+        content: Optional[bytes] = None,
+        tree: Optional[etree._ElementTree] = None,
+    ):
+        """Load and parse the .als file, or its decompressed XML content
 
-    def load(self):
-        """Load and parse the .als file"""
+        tree is an already parsed project from parse_xml(); it is copied, not
+        modified, so one parsed skeleton can back many editors.
+        """
         try:
-            with gzip.open(self.als_file, "rt", encoding="utf-8") as f:
-                content = f.read()
-
-            self.tree = ET.ElementTree(ET.fromstring(content))
+            if tree is not None:
+                # A C-level tree copy is cheaper than parsing the XML again
+                self.tree = copy.deepcopy(tree)
+            elif content is None:
+                # Let libxml2 pull straight from the gzip stream rather than
+                # holding the decompressed document in memory as well
+                with _open_als(self.als_file) as f:
+                    self.tree = etree.parse(f, _XML_PARSER)
+            else:
+                self.tree = self.parse_xml(content)
             self.root = self.tree.getroot()
 
+            # Resolve every element the edits need in one walk of the tree
+            self._locate_targets()
+
             # Find and extract template MIDI clip
             self._find_template_clip()
 
@@ -42,21 +168,66 @@ class AbletonProjectEditor:
             # Find audio tracks
             self._find_audio_tracks()
 
+            # Start from note-free templates so no clip ever needs clearing
+            for template in (self.template_clip, self.osc_template_clip):
+                if template is not None:
+                    self._clear_clip_notes(template)
+
+            # Build the clip format strings and serialize the audio template
+            # once; each new clip is then a single C-level parse
+            self._clip_template = self._build_clip_template(
+                self.template_clip
+            )
+            self._osc_clip_template = self._build_clip_template(
+                self.osc_template_clip
+            )
+            self._template_audio_clip_bytes = self._serialize_template(
+                self.template_audio_clip
+            )
+
         except Exception as e:
             raise ValueError(f"Could not load .als file: {e}")
 
+    def _locate_targets(self):
+        """Collect the clips, tracks and master envelopes along fixed paths"""
+        live_set = self.root.find("LiveSet")
+        if live_set is None:
+            return
+
+        # Every track, grouped or not, is a direct child of LiveSet/Tracks.
+        # Index them by name once so later lookups never walk the tree
+        tracks = live_set.find("Tracks")
+        for track in tracks if tracks is not None else ():
+            if track.tag == "MidiTrack":
+                tracks_by_name = self._midi_tracks_by_name
+                if self._first_midi_clip is None:
+                    self._first_midi_clip = _first(_XP_MIDI_CLIPS, track)
+            elif track.tag == "AudioTrack":
+                tracks_by_name = self._audio_tracks_by_name
+            else:
+                continue
+
+            # Keep the first track of each name, as a tree walk would find
+            name_elem = _first(_XP_EFFECTIVE_NAME, track)
+            if name_elem is not None:
+                tracks_by_name.setdefault(name_elem.get("Value", ""), track)
+
+        self._master_track = live_set.find("MasterTrack")
+
+        if self._master_track is not None:
+            self._master_envelopes_container = _first(
+                _XP_MASTER_ENVELOPES, self._master_track
+            )
+
     def _find_template_clip(self):
         """Find a template MIDI clip and its container"""
-        # Look for any existing MidiClip to use as template
-        midi_clips = self.root.findall(".//MidiClip")
-
-        if not midi_clips:
+        # Use the first MIDI clip in the project as template
+        if self._first_midi_clip is None:
             raise ValueError(
                 "No MIDI clips found in .als file to use as template"
             )
 
-        # Use the first MIDI clip as template
-        self.template_clip = midi_clips[0]
+        self.template_clip = self._first_midi_clip
 
         # Find the container by searching for the parent that contains this clip
         self.clips_container = self._find_clips_container()
@@ -67,19 +238,15 @@ class AbletonProjectEditor:
 
     def _find_osc_template_clip(self):
         """Find the OSC track and its template MIDI clip"""
-        # Find all MIDI tracks
-        midi_tracks = self.root.findall(".//MidiTrack")
-
-        osc_track = None
-        for track in midi_tracks:
-            # Look for track name containing "External +OSC"
-            name_elem = track.find(".//Name/EffectiveName")
-            if (
-                name_elem is not None
-                and "External +OSC" in name_elem.get("Value", "")
-            ):
-                osc_track = track
-                break
+        # Look for track name containing "External +OSC"
+        osc_track = next(
+            (
+                track
+                for track_name, track in self._midi_tracks_by_name.items()
+                if "External +OSC" in track_name
+            ),
+            None,
+        )
 
         if osc_track is None:
             print(
@@ -88,7 +255,7 @@ class AbletonProjectEditor:
             return
 
         # Find MIDI clips in this track
-        osc_clips = osc_track.findall(".//MidiClip")
+        osc_clips = _XP_MIDI_CLIPS(osc_track)
 
         if not osc_clips:
             print(
@@ -108,39 +275,24 @@ class AbletonProjectEditor:
 
     def _find_audio_tracks(self):
         """Find audio tracks and store them for later use"""
-        audio_tracks = self.root.findall(".//AudioTrack")
-
-        for track in audio_tracks:
-            name_elem = track.find(".//Name/EffectiveName")
-            if name_elem is not None:
-                track_name = name_elem.get("Value", "")
-                if track_name in AudioFileMapper.TRACK_MAPPINGS:
-                    self.audio_tracks[track_name] = track
-                    print(f"Found audio track: '{track_name}'")
-
-                    # Find template audio clip if we don't have one yet
-                    if self.template_audio_clip is None:
-                        audio_clips = track.findall(".//AudioClip")
-                        if audio_clips:
-                            self.template_audio_clip = audio_clips[0]
-                            print(
-                                f"Using audio clip from '{track_name}' as template"
-                            )
+        for track_name, track in self._audio_tracks_by_name.items():
+            if track_name in AudioFileMapper.TRACK_MAPPINGS:
+                self.audio_tracks[track_name] = track
+                print(f"Found audio track: '{track_name}'")
+
+                # Find template audio clip if we don't have one yet
+                if self.template_audio_clip is None:
+                    audio_clips = _XP_AUDIO_CLIPS(track)
+                    if audio_clips:
+                        self.template_audio_clip = audio_clips[0]
+                        print(
+                            f"Using audio clip from '{track_name}' as template"
+                        )
 
     def _find_clips_container(self):
         """Find the container that holds MIDI clips"""
-
-        # Search through the XML tree to find the parent of our template clip
-        def find_parent(element, target):
-            for child in element:
-                if child == target:
-                    return element
-                parent = find_parent(child, target)
-                if parent is not None:
-                    return parent
-            return None
-
-        container = find_parent(self.root, self.template_clip)
+        # lxml keeps a parent pointer on every element
+        container = self.template_clip.getparent()
         if container is None:
             raise ValueError("Could not find container for MIDI clips")
 
@@ -149,16 +301,32 @@ class AbletonProjectEditor:
     def _find_osc_clips_container(self, osc_track):
         """Find the container that holds OSC MIDI clips"""
         # Look for the ArrangerAutomation/Events container in the OSC track
-        events_container = osc_track.find(".//ArrangerAutomation/Events")
+        events_container = _first(_XP_ARRANGER_EVENTS, osc_track)
         if events_container is None:
             print("Warning: Could not find OSC clips container")
             return None
 
         return events_container
 
-    def _get_clip_name(self, clip_element) -> str:
+    def _serialize_template(
+        self, template: Optional[etree._Element]
+    ) -> Optional[bytes]:
+        """Serialize a template element so it can be cloned cheaply"""
+        if template is None:
+            return None
+        return etree.tostring(template, with_tail=False)
+
+    def _clone_template(
+        self, template: etree._Element, template_bytes: bytes
+    ) -> etree._Element:
+        """Create a fresh copy of a template from its serialized form"""
+        new_element = etree.fromstring(template_bytes, _XML_PARSER)
+        new_element.tail = template.tail
+        return new_element
+
+    def _get_clip_name(self, clip_element: etree._Element) -> str:
         """Get the name of a MIDI clip"""
-        name_elem = clip_element.find(".//Name")
+        name_elem = _first(_XP_NAME, clip_element)
         return (
             name_elem.get("Value", "Unnamed")
             if name_elem is not None
@@ -167,10 +335,7 @@ class AbletonProjectEditor:
 
     def _normalize_name(self, name: str) -> str:
         """Normalize name to lowercase with underscores."""
-        # Remove special characters and replace spaces with underscores
-        normalized = re.sub(r"[^\w\s-]", "", name.lower())
-        normalized = re.sub(r"[-\s]+", "_", normalized)
-        return normalized.strip("_")
+        return normalize_name(name)
 
     def _calculate_clip_durations(
         self, markers: List[Marker], session_end_beat: Optional[float] = None
@@ -200,8 +365,12 @@ class AbletonProjectEditor:
             duration = max(duration, 1.0)
 
             clips_with_durations.append((marker, duration))
-            print(
-                f"Clip '{marker.name}': {duration} beats (from beat {marker.beat_position} to {marker.beat_position + duration})"
+            logger.debug(
+                "Clip '%s': %s beats (from beat %s to %s)",
+                marker.name,
+                duration,
+                marker.beat_position,
+                marker.beat_position + duration,
             )
 
         return clips_with_durations
@@ -210,7 +379,7 @@ class AbletonProjectEditor:
         self, markers: List[Marker], session_end_beat: Optional[float] = None
     ):
         """Create MIDI clips from markers"""
-        if not self.template_clip or not self.clips_container:
+        if self.template_clip is None or self.clips_container is None:
             raise ValueError("No template clip or container available")
 
         # Calculate durations for each clip
@@ -218,19 +387,33 @@ class AbletonProjectEditor:
             markers, session_end_beat
         )
 
-        # Remove existing clips except the template
-        clips_to_remove = [
-            clip
-            for clip in self.clips_container.findall("MidiClip")
-            if clip != self.template_clip
+        # Remove existing clips except the template in one slice assignment
+        self.clips_container[:] = [
+            child
+            for child in self.clips_container
+            if child.tag != "MidiClip" or child is self.template_clip
         ]
-        for clip in clips_to_remove:
-            self.clips_container.remove(clip)
 
         # Create new clips from markers
-        for i, (marker, duration) in enumerate(clips_with_durations):
-            new_clip = self._create_clip_from_marker(marker, duration, i)
-            self.clips_container.append(new_clip)
+        self.clips_container.extend(
+            self._render_clips(
+                self._clip_template,
+                self.template_clip,
+                [
+                    (marker, duration, marker.name)
+                    for marker, duration in clips_with_durations
+                ],
+            )
+        )
+
+        if logger.isEnabledFor(logging.DEBUG):
+            for marker, duration in clips_with_durations:
+                logger.debug(
+                    "Created clip: '%s' at beat %s with duration %s",
+                    marker.name,
+                    marker.beat_position,
+                    duration,
+                )
 
         # Remove the template clip
         self.clips_container.remove(self.template_clip)
@@ -244,7 +427,10 @@ class AbletonProjectEditor:
         session_end_beat: Optional[float] = None,
     ):
         """Create OSC MIDI clips from markers"""
-        if not self.osc_template_clip or not self.osc_clips_container:
+        if (
+            self.osc_template_clip is None
+            or self.osc_clips_container is None
+        ):
             print(
                 "Warning: No OSC template clip or container available, skipping OSC clip creation"
             )
@@ -255,26 +441,33 @@ class AbletonProjectEditor:
             markers, session_end_beat
         )
 
-        # Remove existing OSC clips except the template
-        clips_to_remove = [
-            clip
-            for clip in self.osc_clips_container.findall("MidiClip")
-            if clip != self.osc_template_clip
+        # Remove existing OSC clips except the template in one slice assignment
+        self.osc_clips_container[:] = [
+            child
+            for child in self.osc_clips_container
+            if child.tag != "MidiClip" or child is self.osc_template_clip
         ]
-        for clip in clips_to_remove:
-            self.osc_clips_container.remove(clip)
 
         # Create new OSC clips from markers
-        for i, (marker, duration) in enumerate(clips_with_durations):
+        osc_prefix = "/ableton/" + self._normalize_name(song_name) + "/"
+        osc_clips = []
+        for marker, duration in clips_with_durations:
             # Create OSC formatted name
-            normalized_song = self._normalize_name(song_name)
-            normalized_section = self._normalize_name(marker.name)
-            osc_name = f"/ableton/{normalized_song}/{normalized_section}"
+            osc_name = osc_prefix + self._normalize_name(marker.name)
+            osc_clips.append((marker, duration, osc_name))
+
+            logger.debug(
+                "Created OSC clip: '%s' at beat %s with duration %s",
+                osc_name,
+                marker.beat_position,
+                duration,
+            )
 
-            new_clip = self._create_osc_clip_from_marker(
-                marker, duration, i, osc_name
+        self.osc_clips_container.extend(
+            self._render_clips(
+                self._osc_clip_template, self.osc_template_clip, osc_clips
             )
-            self.osc_clips_container.append(new_clip)
+        )
 
         # Remove the OSC template clip
         self.osc_clips_container.remove(self.osc_template_clip)
@@ -285,7 +478,7 @@ class AbletonProjectEditor:
         self, audio_mapper: AudioFileMapper, project_samples_dir: Path
     ):
         """Add audio files to their respective tracks"""
-        if not self.template_audio_clip:
+        if self.template_audio_clip is None:
             print(
                 "Warning: No template audio clip found, skipping audio file addition"
             )
@@ -328,16 +521,14 @@ class AbletonProjectEditor:
 
     def _add_audio_clip_to_track(
         self,
-        track_element: ET.Element,
+        track_element: etree._Element,
         audio_file_path: Path,
         clip_name: str,
         duration_seconds: float,
     ):
         """Add an audio clip to a track with full file duration"""
         # Find the Sample/ArrangerAutomation/Events container
-        events_container = track_element.find(
-            ".//Sample/ArrangerAutomation/Events"
-        )
+        events_container = _first(_XP_SAMPLE_EVENTS, track_element)
 
         if events_container is None:
             print(f"Warning: Could not find events container for track")
@@ -349,40 +540,41 @@ class AbletonProjectEditor:
             events_container.remove(clip)
 
         # Create new audio clip based on template
-        new_clip = copy.deepcopy(self.template_audio_clip)
+        new_clip = self._clone_template(
+            self.template_audio_clip, self._template_audio_clip_bytes
+        )
 
         # Update clip properties
         new_clip.set("Id", "0")
         new_clip.set("Time", "0")
 
         # Update clip name
-        name_elem = new_clip.find(".//Name")
+        name_elem = _first(_XP_NAME, new_clip)
         if name_elem is not None:
             name_elem.set("Value", clip_name.replace(".wav", ""))
 
+        # Convert seconds to beats (assuming 120 BPM for now - this could be improved)
+        # At 120 BPM, 1 beat = 0.5 seconds, so beats = seconds * 2
+        duration_beats = str(duration_seconds * 2)  # This is a simplification
+
         # Update clip timing to match full audio file duration
-        current_end_elem = new_clip.find(".//CurrentEnd")
+        current_end_elem = _first(_XP_CURRENT_END, new_clip)
         if current_end_elem is not None:
-            # Convert seconds to beats (assuming 120 BPM for now - this could be improved)
-            # At 120 BPM, 1 beat = 0.5 seconds, so beats = seconds * 2
-            duration_beats = (
-                duration_seconds * 2
-            )  # This is a simplification
-            current_end_elem.set("Value", str(duration_beats))
+            current_end_elem.set("Value", duration_beats)
 
         # Update loop settings to match full duration
-        loop_elem = new_clip.find(".//Loop")
+        loop_elem = _first(_XP_LOOP, new_clip)
         if loop_elem is not None:
-            loop_end_elem = loop_elem.find(".//LoopEnd")
-            out_marker_elem = loop_elem.find(".//OutMarker")
+            loop_end_elem = loop_elem.find("LoopEnd")
+            out_marker_elem = loop_elem.find("OutMarker")
 
             if loop_end_elem is not None:
-                loop_end_elem.set("Value", str(duration_beats))
+                loop_end_elem.set("Value", duration_beats)
             if out_marker_elem is not None:
-                out_marker_elem.set("Value", str(duration_beats))
+                out_marker_elem.set("Value", duration_beats)
 
         # Update file reference
-        file_ref = new_clip.find(".//SampleRef/FileRef")
+        file_ref = _first(_XP_FILE_REF, new_clip)
         if file_ref is not None:
             relative_path_string = f"Samples/Imported/{audio_file_path.name}"
 
@@ -410,49 +602,23 @@ class AbletonProjectEditor:
             return
 
         # Recreate the tempo automation envelope to ensure it's clean
-        tempo_envelope = self._recreate_tempo_envelope()
-        events_container = tempo_envelope.find(".//Events")
-
-        # Create tempo events with proper interpolation prevention
-        event_id = 0
-
-        # Add initial tempo event at the very beginning
-        if tempo_changes[0].beat_position > 0:
-            # Use first tempo change value as initial tempo
-            initial_event = ET.SubElement(events_container, "FloatEvent")
-            initial_event.set("Id", str(event_id))
-            initial_event.set(
-                "Time", "-63072000"
-            )  # Very beginning of timeline
-            initial_event.set("Value", str(tempo_changes[0].tempo))
-            event_id += 1
-
-        # Add tempo change events
-        for i, tempo_change in enumerate(tempo_changes):
-            # If this isn't the first tempo change, add a "hold" event just before
-            # the new tempo to prevent interpolation
-            if i > 0:
-                prev_tempo = tempo_changes[i - 1].tempo
-                hold_time = (
-                    tempo_change.beat_position - 0.001
-                )  # Just before the change
-
-                hold_event = ET.SubElement(events_container, "FloatEvent")
-                hold_event.set("Id", str(event_id))
-                hold_event.set("Time", str(hold_time))
-                hold_event.set("Value", str(prev_tempo))
-                event_id += 1
-
-            # Add the actual tempo change event
-            tempo_event = ET.SubElement(events_container, "FloatEvent")
-            tempo_event.set("Id", str(event_id))
-            tempo_event.set("Time", str(tempo_change.beat_position))
-            tempo_event.set("Value", str(tempo_change.tempo))
-            event_id += 1
+        tempo_envelope = self._recreate_envelope(self.POINTEE_TEMPO, "tempo")
+        events_container = _first(_XP_EVENTS, tempo_envelope)
+
+        # Pull the change list into flat columns once, then emit the events
+        times = [tempo_change.beat_position for tempo_change in tempo_changes]
+        values = [str(tempo_change.tempo) for tempo_change in tempo_changes]
+        self._write_automation_events(
+            events_container, "FloatEvent", times, values
+        )
 
-            print(
-                f"Added tempo change: {tempo_change.tempo} BPM at beat {tempo_change.beat_position}"
-            )
+        if logger.isEnabledFor(logging.DEBUG):
+            for tempo_change in tempo_changes:
+                logger.debug(
+                    "Added tempo change: %s BPM at beat %s",
+                    tempo_change.tempo,
+                    tempo_change.beat_position,
+                )
 
         print(f"Applied {len(tempo_changes)} tempo changes")
 
@@ -465,288 +631,236 @@ class AbletonProjectEditor:
             return
 
         # Recreate the time signature automation envelope to ensure it's clean
-        time_sig_envelope = self._recreate_time_signature_envelope()
-        events_container = time_sig_envelope.find(".//Events")
-
-        # Create time signature events
-        event_id = 0
-
-        # Add initial time signature event at the very beginning
-        if time_signature_changes[0].beat_position > 0:
-            # Use first time signature change value as initial
-            initial_event = ET.SubElement(events_container, "EnumEvent")
-            initial_event.set("Id", str(event_id))
-            initial_event.set(
-                "Time", "-63072000"
-            )  # Very beginning of timeline
-            initial_event.set(
-                "Value", str(time_signature_changes[0].ableton_value)
-            )
-            event_id += 1
-
-        # Add time signature change events
-        for i, time_sig_change in enumerate(time_signature_changes):
-            # If this isn't the first time signature change, add a "hold" event just before
-            # the new time signature to prevent interpolation
-            if i > 0:
-                prev_time_sig = time_signature_changes[i - 1].ableton_value
-                hold_time = (
-                    time_sig_change.beat_position - 0.001
-                )  # Just before the change
-
-                hold_event = ET.SubElement(events_container, "EnumEvent")
-                hold_event.set("Id", str(event_id))
-                hold_event.set("Time", str(hold_time))
-                hold_event.set("Value", str(prev_time_sig))
-                event_id += 1
-
-            # Add the actual time signature change event
-            time_sig_event = ET.SubElement(events_container, "EnumEvent")
-            time_sig_event.set("Id", str(event_id))
-            time_sig_event.set("Time", str(time_sig_change.beat_position))
-            time_sig_event.set("Value", str(time_sig_change.ableton_value))
-            event_id += 1
-
-            print(
-                f"Added time signature change: {time_sig_change.numerator}/{time_sig_change.denominator} at beat {time_sig_change.beat_position}"
-            )
-
-        print(f"Applied {len(time_signature_changes)} time signature changes")
-
-    def _recreate_tempo_envelope(self):
-        """Deletes any existing tempo envelope and creates a new, clean one."""
-        # Find master track
-        master_track = self.root.find(".//MasterTrack")
-        if master_track is None:
-            raise ValueError("Could not find master track")
-
-        # Find automation envelopes container
-        envelopes_container = master_track.find(
-            ".//AutomationEnvelopes/Envelopes"
+        time_sig_envelope = self._recreate_envelope(
+            self.POINTEE_TIME_SIGNATURE, "time signature"
         )
-        if envelopes_container is None:
-            raise ValueError("Could not find automation envelopes container")
+        events_container = _first(_XP_EVENTS, time_sig_envelope)
 
-        # Find and remove existing tempo envelope (PointeeId="8")
-        for envelope in list(
-            envelopes_container.findall("AutomationEnvelope")
-        ):
-            target = envelope.find(".//EnvelopeTarget/PointeeId")
-            if target is not None and target.get("Value") == "8":
-                envelopes_container.remove(envelope)
-                print("Removed existing tempo automation envelope.")
-
-        # Create a new, clean tempo envelope
-        print("Creating new tempo automation envelope.")
-        tempo_envelope = ET.SubElement(
-            envelopes_container, "AutomationEnvelope"
+        # Pull the change list into flat columns once, then emit the events
+        times = [change.beat_position for change in time_signature_changes]
+        values = [
+            str(change.ableton_value) for change in time_signature_changes
+        ]
+        self._write_automation_events(
+            events_container, "EnumEvent", times, values
         )
-        tempo_envelope.set("Id", str(len(envelopes_container)))
 
-        # Create envelope target
-        envelope_target = ET.SubElement(tempo_envelope, "EnvelopeTarget")
-        pointee_id = ET.SubElement(envelope_target, "PointeeId")
-        pointee_id.set("Value", "8")  # Tempo parameter ID
+        if logger.isEnabledFor(logging.DEBUG):
+            for change in time_signature_changes:
+                logger.debug(
+                    "Added time signature change: %s/%s at beat %s",
+                    change.numerator,
+                    change.denominator,
+                    change.beat_position,
+                )
 
-        # Create automation container
-        automation = ET.SubElement(tempo_envelope, "Automation")
-        ET.SubElement(automation, "Events")
+        print(f"Applied {len(time_signature_changes)} time signature changes")
 
-        # Create automation transform view state
-        transform_state = ET.SubElement(
-            automation, "AutomationTransformViewState"
-        )
-        is_pending = ET.SubElement(transform_state, "IsTransformPending")
-        is_pending.set("Value", "false")
-        ET.SubElement(transform_state, "TimeAndValueTransforms")
+    @staticmethod
+    def _write_automation_events(
+        events_container: etree._Element,
+        event_tag: str,
+        times: List[float],
+        values: List[str],
+    ):
+        """Write automation events, holding each value until the next change"""
+        # Build the whole event list as text and parse it in one go rather
+        # than creating every event with its own SubElement call
+        events = []
+        event_template = '<' + event_tag + ' Id="{}" Time="{}" Value="{}"/>'
+
+        # Add initial event at the very beginning using the first value
+        if times[0] > 0:
+            events.append(
+                event_template.format(len(events), "-63072000", values[0])
+            )
 
-        return tempo_envelope
+        previous_value = None
+        for time, value in zip(times, values):
+            # Add a "hold" event just before each change to prevent
+            # interpolation
+            if previous_value is not None:
+                events.append(
+                    event_template.format(
+                        len(events), time - 0.001, previous_value
+                    )
+                )
 
-    def _recreate_time_signature_envelope(self):
-        """Deletes any existing time signature envelope and creates a new, clean one."""
-        # Find master track
-        master_track = self.root.find(".//MasterTrack")
-        if master_track is None:
-            raise ValueError("Could not find master track")
+            events.append(event_template.format(len(events), time, value))
+            previous_value = value
 
-        # Find automation envelopes container
-        envelopes_container = master_track.find(
-            ".//AutomationEnvelopes/Envelopes"
+        new_events = etree.fromstring(
+            "<Events>" + "".join(events) + "</Events>", _XML_PARSER
         )
+        new_events.tail = events_container.tail
+        events_container.getparent().replace(events_container, new_events)
+
+    def _index_envelopes(self, envelopes_container):
+        """Index the automation envelopes by PointeeId, scanning them once"""
+        if self._envelopes_by_pointee is None:
+            self._envelopes_by_pointee = {}
+            for envelope in _XP_AUTOMATION_ENVELOPES(envelopes_container):
+                targets = _XP_POINTEE_ID(envelope)
+                if not targets:
+                    continue
+                try:
+                    pointee_id = int(targets[0].get("Value"))
+                except (TypeError, ValueError):
+                    continue
+                self._envelopes_by_pointee.setdefault(pointee_id, []).append(
+                    envelope
+                )
+
+        return self._envelopes_by_pointee
+
+    def _recreate_envelope(self, pointee_id: int, description: str):
+        """Deletes any existing envelope for a master track parameter and
+        creates a new, clean one."""
+        # Master track and its envelopes container are located at load time
+        if self._master_track is None:
+            raise ValueError("Could not find master track")
+
+        envelopes_container = self._master_envelopes_container
         if envelopes_container is None:
             raise ValueError("Could not find automation envelopes container")
 
-        # Find and remove existing time signature envelope (PointeeId="10")
-        for envelope in list(
-            envelopes_container.findall("AutomationEnvelope")
-        ):
-            target = envelope.find(".//EnvelopeTarget/PointeeId")
-            if target is not None and target.get("Value") == "10":
-                envelopes_container.remove(envelope)
-                print("Removed existing time signature automation envelope.")
-
-        # Create a new, clean time signature envelope
-        print("Creating new time signature automation envelope.")
-        time_sig_envelope = ET.SubElement(
-            envelopes_container, "AutomationEnvelope"
-        )
-        time_sig_envelope.set("Id", str(len(envelopes_container)))
+        # Find and remove existing envelopes targeting this parameter
+        envelopes_by_pointee = self._index_envelopes(envelopes_container)
+        for envelope in envelopes_by_pointee.pop(pointee_id, []):
+            envelopes_container.remove(envelope)
+            logger.debug(
+                "Removed existing %s automation envelope.", description
+            )
+
+        # Create a new, clean envelope
+        logger.debug("Creating new %s automation envelope.", description)
+        envelope = etree.SubElement(envelopes_container, "AutomationEnvelope")
+        envelope.set("Id", str(len(envelopes_container)))
 
         # Create envelope target
-        envelope_target = ET.SubElement(time_sig_envelope, "EnvelopeTarget")
-        pointee_id = ET.SubElement(envelope_target, "PointeeId")
-        pointee_id.set("Value", "10")  # Time signature parameter ID
+        envelope_target = etree.SubElement(envelope, "EnvelopeTarget")
+        pointee = etree.SubElement(envelope_target, "PointeeId")
+        pointee.set("Value", str(pointee_id))
 
         # Create automation container
-        automation = ET.SubElement(time_sig_envelope, "Automation")
-        ET.SubElement(automation, "Events")
+        automation = etree.SubElement(envelope, "Automation")
+        etree.SubElement(automation, "Events")
 
         # Create automation transform view state
-        transform_state = ET.SubElement(
+        transform_state = etree.SubElement(
             automation, "AutomationTransformViewState"
         )
-        is_pending = ET.SubElement(transform_state, "IsTransformPending")
+        is_pending = etree.SubElement(transform_state, "IsTransformPending")
         is_pending.set("Value", "false")
-        ET.SubElement(transform_state, "TimeAndValueTransforms")
-
-        return time_sig_envelope
+        etree.SubElement(transform_state, "TimeAndValueTransforms")
 
-    def _create_clip_from_marker(
-        self, marker: Marker, duration: float, clip_id: int
-    ) -> ET.Element:
-        """Create a new MIDI clip from a marker with specified duration"""
-        # Deep copy the template clip
-        new_clip = copy.deepcopy(self.template_clip)
+        envelopes_by_pointee[pointee_id] = [envelope]
 
-        # Update clip properties
-        new_clip.set("Id", str(clip_id))
-        new_clip.set("Time", str(marker.beat_position))
+        return envelope
 
-        # Calculate end position
-        end_position = marker.beat_position + duration
+    def _build_clip_template(
+        self, template: Optional[etree._Element]
+    ) -> Optional[str]:
+        """Build a str.format template for clips cloned from a template clip"""
+        if template is None:
+            return None
 
-        # Update internal elements
-        self._update_clip_element(new_clip, "LomId", str(clip_id))
-        self._update_clip_element(new_clip, "LomIdView", str(clip_id))
-        self._update_clip_element(
-            new_clip, "CurrentStart", str(marker.beat_position)
+        clip = etree.fromstring(
+            self._serialize_template(template), _XML_PARSER
         )
-        self._update_clip_element(new_clip, "CurrentEnd", str(end_position))
-        self._update_clip_element(new_clip, "Name", marker.name)
 
-        # Update loop settings
-        loop_elem = new_clip.find(".//Loop")
-        if loop_elem is not None:
+        # Mark every per-clip value with a placeholder token
+        clip.set("Id", _CLIP_PLACEHOLDERS["clip_id"])
+        clip.set("Time", _CLIP_PLACEHOLDERS["time"])
+        pending = dict(_CLIP_CHILD_FIELDS)
+        for child in clip:
+            field = pending.pop(child.tag, None)
+            if field is not None:
+                child.set("Value", _CLIP_PLACEHOLDERS[field])
+                if not pending:
+                    break
+
+        loop_elems = _XP_LOOP(clip)
+        if loop_elems:
+            loop_elem = loop_elems[0]
             self._update_element_in_container(loop_elem, "LoopStart", "0")
             self._update_element_in_container(
-                loop_elem, "LoopEnd", str(duration)
+                loop_elem, "LoopEnd", _CLIP_PLACEHOLDERS["duration"]
             )
             self._update_element_in_container(
-                loop_elem, "OutMarker", str(duration)
+                loop_elem, "OutMarker", _CLIP_PLACEHOLDERS["duration"]
             )
 
-        # Clear any existing notes
-        self._clear_clip_notes(new_clip)
-
-        print(
-            f"Created clip: '{marker.name}' at beat {marker.beat_position} with duration {duration}"
-        )
-
-        return new_clip
+        xml = etree.tostring(clip, encoding="unicode", with_tail=False)
+        xml = xml.replace("{", "{{").replace("}", "}}")
+        for field, token in _CLIP_PLACEHOLDERS.items():
+            xml = xml.replace(token, "{" + field + "}")
+        return xml
 
-    def _create_osc_clip_from_marker(
-        self, marker: Marker, duration: float, clip_id: int, osc_name: str
-    ) -> ET.Element:
-        """Create a new OSC MIDI clip from a marker with specified duration and OSC name"""
-        # Deep copy the OSC template clip
-        new_clip = copy.deepcopy(self.osc_template_clip)
-
-        # Update clip properties
-        new_clip.set("Id", str(clip_id))
-        new_clip.set("Time", str(marker.beat_position))
-
-        # Calculate end position
-        end_position = marker.beat_position + duration
-
-        # Update internal elements
-        self._update_clip_element(new_clip, "LomId", str(clip_id))
-        self._update_clip_element(new_clip, "LomIdView", str(clip_id))
-        self._update_clip_element(
-            new_clip, "CurrentStart", str(marker.beat_position)
-        )
-        self._update_clip_element(new_clip, "CurrentEnd", str(end_position))
-        self._update_clip_element(new_clip, "Name", osc_name)
-
-        # Update loop settings
-        loop_elem = new_clip.find(".//Loop")
-        if loop_elem is not None:
-            self._update_element_in_container(loop_elem, "LoopStart", "0")
-            self._update_element_in_container(
-                loop_elem, "LoopEnd", str(duration)
-            )
-            self._update_element_in_container(
-                loop_elem, "OutMarker", str(duration)
+    def _render_clips(
+        self,
+        clip_template: str,
+        template: etree._Element,
+        clips: List[Tuple[Marker, float, str]],
+    ) -> List[etree._Element]:
+        """Create clip elements from a clip format template in one parse"""
+        # Format every clip into one document so libxml2 parses them all in
+        # one call instead of once per clip
+        fragments = "".join(
+            clip_template.format(
+                clip_id=clip_id,
+                time=marker.beat_position,
+                end=marker.beat_position + duration,
+                duration=duration,
+                name=escape(name, _ATTR_ENTITIES),
             )
-
-        # Clear any existing notes
-        self._clear_clip_notes(new_clip)
-
-        print(
-            f"Created OSC clip: '{osc_name}' at beat {marker.beat_position} with duration {duration}"
+            for clip_id, (marker, duration, name) in enumerate(clips)
         )
-
-        return new_clip
-
-    def _update_clip_element(
-        self, clip: ET.Element, tag_name: str, value: str
-    ):
-        """Update a direct child element of the clip"""
-        elem = clip.find(f".//{tag_name}")
-        if elem is not None:
-            elem.set("Value", value)
+        new_clips = list(
+            etree.fromstring(f"<Clips>{fragments}</Clips>", _XML_PARSER)
+        )
+        for new_clip in new_clips:
+            new_clip.tail = template.tail
+        return new_clips
 
     def _update_element_in_container(
-        self, container: ET.Element, tag_name: str, value: str
-    ):
+        self, container: etree._Element, tag_name: str, value: str
+    ) -> None:
         """Update an element within a container"""
-        elem = container.find(f".//{tag_name}")
+        elem = container.find(tag_name)
         if elem is not None:
             elem.set("Value", value)
 
-    def _clear_clip_notes(self, clip: ET.Element):
+    def _clear_clip_notes(self, clip: etree._Element) -> None:
         """Clear all notes from a MIDI clip"""
-        notes_elem = clip.find(".//Notes")
-        if notes_elem is not None:
+        notes_elems = _XP_NOTES(clip)
+        if notes_elems:
+            notes_elem = notes_elems[0]
             # Clear KeyTracks and EventLists
-            key_tracks = notes_elem.find(".//KeyTracks")
+            key_tracks = notes_elem.find("KeyTracks")
             if key_tracks is not None:
                 key_tracks.clear()
 
-            event_store = notes_elem.find(".//PerNoteEventStore")
+            event_store = notes_elem.find("PerNoteEventStore")
             if event_store is not None:
-                event_lists = event_store.find(".//EventLists")
+                event_lists = event_store.find("EventLists")
                 if event_lists is not None:
                     event_lists.clear()
 
-    def save(self, output_file: Path):
+    def save(
+        self, output_file: Path, compresslevel: int = GZIP_COMPRESS_LEVEL
+    ):
         """Save the modified .als file"""
         try:
-            # Properly format the XML with declaration
-            ET.register_namespace("", "http://www.ableton.com/live")
-
-            # Convert tree back to string with proper formatting
-            xml_str = ET.tostring(
-                self.root, encoding="unicode", xml_declaration=False
-            )
-
-            # Add XML declaration manually
-            xml_content = (
-                '<?xml version="1.0" encoding="UTF-8"?>\n' + xml_str
-            )
-
-            # Write compressed XML
-            with gzip.open(output_file, "wt", encoding="utf-8") as f:
-                f.write(xml_content)
+            # Serialize incrementally through a large buffer into gzip instead
+            # of materializing the whole document, keeping the double-quoted
+            # declaration that Live itself writes
+            with gzip.open(
+                output_file, "wb", compresslevel=compresslevel
+            ) as gz, io.BufferedWriter(gz, buffer_size=GZIP_BUFFER_SIZE) as f:
+                f.write(XML_DECLARATION)
+                with etree.xmlfile(f, encoding="UTF-8") as xf:
+                    xf.write(self.root)
 
             print(f"Saved modified project to: {output_file}")
 
@@ -0,0 +1,3 @@
+from .helpers import normalize_name, parse_time_reference
+
+__all__ = ['normalize_name', 'parse_time_reference']
\ No newline at end of file
@@ -0,0 +1,32 @@
+import re
+from functools import lru_cache
+from typing import Optional
+
+_RE_SPECIAL_CHARS = re.compile(r"[^\w\s-]")
+_RE_SEPARATORS = re.compile(r"[-\s]+")
+
+
+def normalize_name(name: str) -> str:
+    """Normalize name to lowercase with underscores."""
+    # Remove special characters and replace spaces with underscores
+    normalized = _RE_SPECIAL_CHARS.sub("", name.lower())
+    normalized = _RE_SEPARATORS.sub("_", normalized)
+    return normalized.strip("_")
+
+
+@lru_cache(maxsize=None)
+def parse_time_reference(time_reference: str) -> Optional[float]:
+    """Convert Pro Tools time reference (e.g., '3|1', '34|3') to beat position.
+
+    Returns None if the time reference could not be parsed.
+    """
+    bar, separator, beat = time_reference.partition("|")
+    try:
+        if separator:
+            # Convert to 0-based beat position (bar-1)*4 + (beat-1)
+            return (int(bar) - 1) * 4 + (int(beat) - 1)
+        else:
+            # If it's just a number, treat it as already a beat position
+            return float(time_reference)
+    except ValueError:
+        return None
\ No newline at end of file
@@ -8,9 +8,59 @@ Now also creates OSC clips for external control and automatically adds audio fil
 """
 
 import argparse
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import List, Optional, Tuple
 
-from utils import find_session_folders, process_session_folder
+from ableton import AbletonProjectEditor
+from utils import find_session_folders, get_project_folder, process_session_folder
+
+
+# Per-worker batch state, set once by init_worker
+_worker_state = {}
+
+
+def configure_logging(level: int):
+    """Configure logging for the main process and each worker process"""
+    logging.basicConfig(level=level, format="%(message)s")
+
+
+def init_worker(level: int, skeleton_file: Path, output_dir: Path, skeleton_content: bytes):
+    """Set up a worker process once with the batch-wide settings and skeleton XML"""
+    configure_logging(level)
+    # Parse the skeleton once per worker; each session then gets a copy
+    _worker_state.update(
+        skeleton_file=skeleton_file,
+        output_dir=output_dir,
+        skeleton_tree=AbletonProjectEditor.parse_xml(skeleton_content),
+    )
+
+
+def resolve_in_worker(session: Tuple[Path, Path]) -> Optional[Path]:
+    """Return the project folder a session will be written to, or None if it can't be told"""
+    session_folder, session_file = session
+    try:
+        return get_project_folder(
+            session_folder, session_file, _worker_state["output_dir"]
+        )
+    except Exception:
+        # process_in_worker reports the error when it gets to this session
+        return None
+
+
+def process_in_worker(session: Tuple[Path, Path]) -> bool:
+    """Process one (session folder, session file) pair using the state set up by init_worker"""
+    session_folder, session_file = session
+    return process_session_folder(
+        session_folder, session_file=session_file, **_worker_state
+    )
+
+
+def process_group_in_worker(sessions: List[Tuple[Path, Path]]) -> List[bool]:
+    """Process sessions that share a project folder one after another, in order"""
+    return [process_in_worker(session) for session in sessions]
 
 
 def main():
@@ -19,9 +69,16 @@ def main():
     )
     parser.add_argument('input_folder', type=Path, 
                        help='Root folder containing session folders (e.g., "NN 4 - DANCE + POP SD")')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                       help='Number of sessions to process in parallel (default: CPU count)')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                       help='Log every clip and automation event that is created')
     
     args = parser.parse_args()
     
+    log_level = logging.DEBUG if args.verbose else logging.INFO
+    configure_logging(log_level)
+    
     # Hardcoded paths
     skeleton_file = Path("./ableton/skeleton Project/skeleton.als")
     output_dir = Path("./output")
@@ -49,15 +106,39 @@ def main():
     
     print(f"Found {len(session_folders)} session folders to process")
     
-    # Process each session folder
+    # Process the session folders in parallel; each one is independent
     successful = 0
     failed = 0
     
-    for session_folder in session_folders:
-        if process_session_folder(session_folder, skeleton_file, output_dir):
-            successful += 1
-        else:
-            failed += 1
+    # Decompress the skeleton once for the whole batch and hand the raw XML
+    # to each worker once, rather than pickling it again with every session
+    skeleton_content = AbletonProjectEditor.read_xml(skeleton_file)
+    
+    with ProcessPoolExecutor(
+        max_workers=max(1, args.jobs),
+        initializer=init_worker,
+        initargs=(log_level, skeleton_file, output_dir, skeleton_content),
+    ) as executor:
+        # Sessions with the same song name and duration write the same
+        # project folder. Group them so each group runs in one worker, in
+        # order, and the last session wins as in a sequential run
+        groups = {}
+        project_folders = executor.map(resolve_in_worker, session_folders)
+        for session, project_folder in zip(session_folders, project_folders):
+            key = project_folder if project_folder is not None else session
+            groups.setdefault(key, []).append(session)
+
+        for key, sessions in groups.items():
+            if len(sessions) > 1:
+                print(f"Warning: {len(sessions)} sessions write to {key.name}; "
+                      f"processing them in order, the last one wins")
+
+        for results in executor.map(process_group_in_worker, groups.values()):
+            for result in results:
+                if result:
+                    successful += 1
+                else:
+                    failed += 1
     
     print(f"\n{'='*60}")
     print(f"PROCESSING COMPLETE")
@@ -1,6 +1,8 @@
 class TempoChange:
     """Represents a tempo change"""
     
+    __slots__ = ('beat_position', 'tempo')
+    
     def __init__(self, beat_position: float, tempo: float):
         self.beat_position = beat_position
         self.tempo = tempo
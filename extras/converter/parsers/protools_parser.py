@@ -2,6 +2,7 @@ import re
 from pathlib import Path
 from typing import List, Tuple, Optional
 
+from common import normalize_name, parse_time_reference
 from models import Marker, TempoChange, TimeSignatureChange
 
 
@@ -56,6 +57,14 @@ class ProToolsSessionParser:
             self.session_end_beat,
         )
 
+    def parse_song_name(self) -> Optional[str]:
+        """Read only the song name from the session file, skipping the markers."""
+        with open(self.session_file, "r", encoding="utf-8") as f:
+            content = f.read()
+
+        self._extract_song_name(content)
+        return self.original_song_name
+
     def _extract_song_name(self, content: str):
         """Extracts and sets the original and normalized song names from the Pro Tools session file."""
         # Look for SESSION NAME line
@@ -94,10 +103,7 @@ class ProToolsSessionParser:
     @staticmethod
     def normalize_name(name: str) -> str:
         """Normalize name to lowercase with underscores."""
-        # Remove special characters and replace spaces with underscores
-        normalized = re.sub(r"[^\w\s-]", "", name.lower())
-        normalized = re.sub(r"[-\s]+", "_", normalized)
-        return normalized.strip("_")
+        return normalize_name(name)
 
     def _extract_markers_section(self, content: str) -> str:
         """Extract the markers section from the session file"""
@@ -233,13 +239,12 @@ class ProToolsSessionParser:
                     name = self._clean_marker_name(name)
 
                     if name and time_reference:
-                        beat_pos = self._parse_time_reference_for_changes(
-                            time_reference
-                        )
+                        # The marker parses its own time reference
+                        marker = Marker(location, time_reference, name)
+                        beat_pos = marker.beat_position
 
                         # Validate marker beat position is reasonable
                         if beat_pos < 10000:  # Reasonable upper limit
-                            marker = Marker(location, time_reference, name)
                             markers.append(marker)
                             print(f"Parsed marker: {marker}")
                         else:
@@ -320,15 +325,8 @@ class ProToolsSessionParser:
 
     def _parse_time_reference_for_changes(self, time_reference: str) -> float:
         """Convert Pro Tools time reference to beat position for tempo/time signature changes"""
-        try:
-            if "|" in time_reference:
-                bar, beat = time_reference.split("|")
-                # Convert to 0-based beat position (bar-1)*4 + (beat-1)
-                return (int(bar) - 1) * 4 + (int(beat) - 1)
-            else:
-                return float(time_reference)
-        except (ValueError, IndexError):
-            return 0.0
+        beat_position = parse_time_reference(time_reference)
+        return 0.0 if beat_position is None else beat_position
 
     def _clean_marker_name(self, name: str) -> str:
         """Clean up marker names"""
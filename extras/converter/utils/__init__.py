@@ -1,3 +1,7 @@
-from .file_utils import find_session_folders, process_session_folder
+from .file_utils import (
+    find_session_folders,
+    get_project_folder,
+    process_session_folder,
+)
 
-__all__ = ['find_session_folders', 'process_session_folder']
\ No newline at end of file
+__all__ = ['find_session_folders', 'get_project_folder', 'process_session_folder']
\ No newline at end of file
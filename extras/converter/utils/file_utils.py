@@ -1,52 +1,128 @@
+import logging
+import os
 from pathlib import Path
-from typing import List
-import traceback
+from typing import List, Optional, Tuple
+
+from lxml import etree
 
 from parsers import ProToolsSessionParser
 from audio import AudioFileMapper
 from ableton import AbletonProjectEditor
 
+logger = logging.getLogger(__name__)
+
+# Separator line printed around each session's heading
+_RULE = "=" * 60
+
+
+def _find_txt_file(folder) -> Optional[str]:
+    """Return the path of the first .txt file directly inside folder, if any."""
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.name.endswith(".txt") and entry.is_file():
+                return entry.path
+    return None
+
 
-def find_session_folders(root_folder: Path) -> List[Path]:
-    """Find all session folders by searching one level deep from the root directory."""
+def find_session_folders(root_folder: Path) -> List[Tuple[Path, Path]]:
+    """Find all session folders by searching one level deep from the root directory.
+
+    Returns (session_folder, session_file) pairs, where session_file is the
+    first .txt file found in the folder.
+    """
     session_folders = []
-    print(f"Searching for session folders in subdirectories of {root_folder}...")
+    logger.info("Searching for session folders in subdirectories of %s...", root_folder)
 
     # Iterate through the top-level genre folders (e.g., "NN 4 - DANCE + POP SD")
-    for genre_folder in root_folder.iterdir():
-        if not genre_folder.is_dir():
-            continue
-
-        # Now iterate through the actual session folders inside the genre folder
-        for session_folder in genre_folder.iterdir():
-            if session_folder.is_dir():
-                # Look for .txt files to confirm it's a session folder
-                txt_files = list(session_folder.glob("*.txt"))
-                if txt_files:
-                    session_folders.append(session_folder)
-                    print(f"Found session folder: {session_folder.name}")
+    with os.scandir(root_folder) as genre_entries:
+        for genre_entry in genre_entries:
+            if not genre_entry.is_dir():
+                continue
+
+            # Now iterate through the actual session folders inside the genre folder
+            with os.scandir(genre_entry.path) as session_entries:
+                for session_entry in session_entries:
+                    if not session_entry.is_dir():
+                        continue
+
+                    # Look for a .txt file to confirm it's a session folder
+                    txt_file = _find_txt_file(session_entry.path)
+                    if txt_file:
+                        session_folders.append(
+                            (Path(session_entry.path), Path(txt_file))
+                        )
+                        logger.debug("Found session folder: %s", session_entry.name)
 
     return session_folders
 
 
+def _project_names(
+    session_folder: Path,
+    session_parser: ProToolsSessionParser,
+    audio_mapper: AudioFileMapper,
+) -> Tuple[str, str]:
+    """Return the final project name (cased, with duration) and the
+    normalized song name used for OSC."""
+    max_duration_sec = audio_mapper.get_max_duration()
+    # Format duration into mm:ss
+    minutes, seconds = divmod(max_duration_sec, 60)
+    duration_str = f"{int(minutes):02d}.{int(seconds):02d}"
+
+    # Determine project names (cased for files, normalized for OSC)
+    if session_parser.original_song_name:
+        project_name_cased = session_parser.original_song_name
+        project_name_normalized = session_parser.song_name
+    else:
+        # Fallback to using the session folder name
+        project_name_cased = session_folder.stem
+        project_name_normalized = ProToolsSessionParser.normalize_name(
+            session_folder.stem
+        )
+
+    # Construct the final project name with duration
+    return f"{project_name_cased} [{duration_str}]", project_name_normalized
+
+
+def get_project_folder(
+    session_folder: Path, session_file: Path, output_dir: Path
+) -> Path:
+    """Return the project folder process_session_folder writes for a session.
+
+    Only the song name and audio durations are read, not the markers.
+    """
+    session_parser = ProToolsSessionParser(session_file)
+    session_parser.parse_song_name()
+    final_project_name, _ = _project_names(
+        session_folder, session_parser, AudioFileMapper(session_folder)
+    )
+    return output_dir / f"{final_project_name} Project"
+
+
 def process_session_folder(
-    session_folder: Path, skeleton_file: Path, output_dir: Path
+    session_folder: Path,
+    skeleton_file: Path,
+    output_dir: Path,
+    skeleton_tree: Optional[etree._ElementTree] = None,
+    session_file: Optional[Path] = None,
 ):
-    """Process a single session folder"""
+    """Process a single session folder
+
+    skeleton_tree is the parsed skeleton project; passing it in lets a batch
+    read and parse the skeleton file only once per process. session_file is the .txt file
+    found by find_session_folders; the folder is only scanned without it.
+    """
     try:
-        print(f"\n{'='*60}")
-        print(f"Processing session: {session_folder.name}")
-        print(f"{'='*60}")
+        logger.info("\n%s\nProcessing session: %s\n%s", _RULE, session_folder.name, _RULE)
 
-        # Find the .txt file in the session folder
-        txt_files = list(session_folder.glob("*.txt"))
-        if not txt_files:
-            print(f"No .txt files found in {session_folder}")
-            return False
+        # Find the .txt file in the session folder, using the first one found
+        if session_file is None:
+            txt_file = _find_txt_file(session_folder)
+            if txt_file is None:
+                logger.warning("No .txt files found in %s", session_folder)
+                return False
 
-        # Use the first .txt file found
-        session_file = txt_files[0]
-        print(f"Using session file: {session_file.name}")
+            session_file = Path(txt_file)
+        logger.debug("Using session file: %s", session_file.name)
 
         # Parse Pro Tools session
         session_parser = ProToolsSessionParser(session_file)
@@ -57,87 +133,69 @@ def process_session_folder(
             session_end_beat,
         ) = session_parser.parse()
 
-        # Create audio file mapper and get song duration
+        # Create audio file mapper and name the project after the song
+        # and its duration
         audio_mapper = AudioFileMapper(session_folder)
-        max_duration_sec = audio_mapper.get_max_duration()
-        # Format duration into mm:ss
-        minutes, seconds = divmod(max_duration_sec, 60)
-        duration_str = f"{int(minutes):02d}.{int(seconds):02d}"
-
-        # Determine project names (cased for files, normalized for OSC)
-        if session_parser.original_song_name:
-            project_name_cased = session_parser.original_song_name
-            project_name_normalized = session_parser.song_name
-        else:
-            # Fallback to using the session folder name
-            project_name_cased = session_folder.stem
-            project_name_normalized = ProToolsSessionParser.normalize_name(
-                session_folder.stem
-            )
-
-        # Construct the final project name with duration
-        final_project_name = f"{project_name_cased} [{duration_str}]"
-
-        print(f"Found {len(markers)} valid markers")
-        print(f"Found {len(tempo_changes)} tempo changes")
-        print(f"Found {len(time_signature_changes)} time signature changes")
+        final_project_name, project_name_normalized = _project_names(
+            session_folder, session_parser, audio_mapper
+        )
+
+        logger.info("Found %d valid markers", len(markers))
+        logger.info("Found %d tempo changes", len(tempo_changes))
+        logger.info("Found %d time signature changes", len(time_signature_changes))
         if session_end_beat:
-            print(f"Session ends at beat {session_end_beat}")
-        print(f"Project Name: '{final_project_name}'")
+            logger.info("Session ends at beat %s", session_end_beat)
+        logger.info("Project Name: '%s'", final_project_name)
 
         # Load and modify Ableton project
-        print(f"Loading skeleton project: {skeleton_file}")
+        logger.debug("Loading skeleton project: %s", skeleton_file)
         editor = AbletonProjectEditor(skeleton_file)
-        editor.load()
+        editor.load(tree=skeleton_tree)
 
         # Create project folder structure with the new name
         project_folder = output_dir / f"{final_project_name} Project"
-        project_folder.mkdir(exist_ok=True)
 
-        # Create samples directory
+        # Create samples directory (and the project folder along with it)
         samples_dir = project_folder / "Samples" / "Imported"
         samples_dir.mkdir(parents=True, exist_ok=True)
 
-        print(f"Created project folder: {project_folder}")
+        logger.debug("Created project folder: %s", project_folder)
 
         # Create MIDI clips from markers
-        print("Creating MIDI clips from markers...")
+        logger.debug("Creating MIDI clips from markers...")
         editor.create_midi_clips_from_markers(markers, session_end_beat)
 
         # Create OSC clips from markers (using normalized name)
-        print("Creating OSC clips from markers...")
+        logger.debug("Creating OSC clips from markers...")
         editor.create_osc_clips_from_markers(
             markers, project_name_normalized, session_end_beat
         )
 
         # Add audio files
-        print("Adding audio files...")
+        logger.debug("Adding audio files...")
         editor.add_audio_files(audio_mapper, samples_dir)
 
         # Apply tempo changes
-        print("Applying tempo changes...")
+        logger.debug("Applying tempo changes...")
         editor.apply_tempo_changes(tempo_changes)
 
         # Apply time signature changes
-        print("Applying time signature changes...")
+        logger.debug("Applying time signature changes...")
         editor.apply_time_signature_changes(time_signature_changes)
 
         # Save modified project (using the new name with duration)
         output_file = project_folder / f"{final_project_name}.als"
         editor.save(output_file)
 
-        print(f"Success! Created complete project in {project_folder}")
-        print(f"- {len(markers)} MIDI clips")
-        print(f"- {len(markers)} OSC clips")
-        print(f"- {len(audio_mapper.get_all_audio_files())} audio files")
-        print(f"- {len(tempo_changes)} tempo changes")
-        print(
-            f"- {len(time_signature_changes)} time signature changes"
-        )
+        logger.info("Success! Created complete project in %s", project_folder)
+        logger.info("- %d MIDI clips", len(markers))
+        logger.info("- %d OSC clips", len(markers))
+        logger.info("- %d audio files", len(audio_mapper.get_all_audio_files()))
+        logger.info("- %d tempo changes", len(tempo_changes))
+        logger.info("- %d time signature changes", len(time_signature_changes))
 
         return True
 
     except Exception as e:
-        print(f"Error processing {session_folder.name}: {e}")
-        traceback.print_exc()
+        logger.exception("Error processing %s: %s", session_folder.name, e)
         return False
\ No newline at end of file
@@ -9,6 +9,10 @@ from flask import Flask, render_template, send_from_directory, jsonify, request
 from flask_cors import CORS
 from zeroconf import Zeroconf, ServiceBrowser, ServiceInfo
 import shared_state
+from json_provider import OrjsonProvider
+
+# Upper bound on devices synced concurrently by the fleet manager
+MAX_SYNC_WORKERS = 32
 
 def create_client_app():
     """Creates and configures the Flask application for the client frontend."""
@@ -27,6 +31,8 @@ def create_client_app():
         template_folder=CLIENT_TEMPLATES_FOLDER,
     )
     
+    app.json = OrjsonProvider(app)
+
     # Apply CORS middleware
     CORS(app)
 
@@ -49,22 +55,8 @@ def create_client_app():
     @app.route("/api/fleet/devices", methods=["GET"])
     def get_fleet_devices():
         """Returns a list of currently discovered StageBridge devices."""
-        print(f"DEBUG: discovered_devices = {shared_state.discovered_devices}")
-        
-        # Filter out non-JSON-serializable fields (like the OSC client)
-        devices = []
-        for device_info in shared_state.discovered_devices.values():
-            # Create a copy without the 'client' field
-            json_safe_device = {
-                'name': device_info['name'],
-                'host': device_info['host'],
-                'ip': device_info['ip'],
-                'port': device_info['port'],
-                'fqdn': device_info['fqdn']
-            }
-            devices.append(json_safe_device)
-        
-        print(f"DEBUG: Returning {len(devices)} devices")
+        # Discovery keeps this list JSON-safe and replaces it wholesale on change
+        devices = shared_state.discovered_devices_public
         return jsonify(devices)
 
     @app.route("/api/fleet/sync", methods=["POST"])
@@ -77,7 +69,7 @@ def create_client_app():
         if not rtp_ip or not rtp_port:
             return jsonify({"error": "Missing rtp_ip or rtp_port"}), 400
 
-        devices_to_sync = list(shared_state.discovered_devices.values())
+        devices_to_sync = shared_state.discovered_devices_snapshot
         
         def update_single_device(device):
             """Helper function to handle the update logic for a single device."""
@@ -85,7 +77,19 @@ def create_client_app():
             device_url = f"http://{device['ip']}:{device['port']}"
             try:
                 print(f"Attempting to sync {device_name} at {device_url}...")
-                
+
+                # Merge, save and restart in one round-trip
+                apply_res = requests.post(
+                    f"{device_url}/api/config/apply-and-restart",
+                    json={"rtp_midi_target_ip": rtp_ip, "rtp_midi_target_port": rtp_port},
+                    timeout=10
+                )
+                if apply_res.status_code != 404:
+                    apply_res.raise_for_status()
+                    print(f"Successfully synced {device_name}")
+                    return {"name": device_name, "status": "success"}
+
+                # Older devices lack that endpoint; fall back to GET/PUT/restart
                 # 1. Fetch current config
                 config_res = requests.get(f"{device_url}/api/config", timeout=10)
                 config_res.raise_for_status()
@@ -124,8 +128,10 @@ def create_client_app():
                 print(error_message)
                 return {"name": device_name, "status": "failure", "reason": str(e)}
 
-        # Use ThreadPoolExecutor for concurrent requests
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+        # Sync every device at once (up to MAX_SYNC_WORKERS) so the whole
+        # fleet takes about as long as its slowest device
+        workers = max(1, min(len(devices_to_sync), MAX_SYNC_WORKERS))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
             results = list(executor.map(update_single_device, devices_to_sync))
 
         return jsonify(results)
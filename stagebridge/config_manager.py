@@ -1,45 +1,208 @@
 # config_manager.py
-import json
+import atexit
+import copy
+import os
+import threading
+from types import MappingProxyType, SimpleNamespace
+
+import orjson
+from mido import Message
+from pythonosc.osc_bundle_builder import IMMEDIATELY, OscBundleBuilder
 import shared_state
+from osc_server import build_message
 
 CONFIG_FILE = "config.json"
 
+# Saves can come from several API request threads at once; this keeps their
+# writes to CONFIG_FILE from interleaving
+_save_lock = threading.Lock()
+
+# Seconds schedule_save waits so a burst of edits is written to disk once
+SAVE_DELAY = 0.5
+# Timer for a write requested by schedule_save that hasn't happened yet
+_pending_save = None
+
+# Default configuration; settings missing from older configs are filled in
+# from here when they are loaded
+DEFAULT_CONFIG = MappingProxyType({
+    "osc_server_ip": "0.0.0.0",
+    "osc_server_port": 9000,
+    "rtp_midi_target_ip": "192.168.1.100",
+    "rtp_midi_target_port": 5004,
+    "midi_input_name": None,
+    "midi_output_name": None,
+    "osc_relay_mode": "zeroconf",  # NEW
+    "osc_broadcast_ip": "0.0.0.0",  # NEW
+    "osc_broadcast_port": 9000,     # NEW
+    "song_parser_settings": {
+        "column_name": "QUAD PATCH",
+        "scene_prefix": "SC ",
+        "footswitch_prefix": "FS ",
+        "osc_prefix": "/patch",
+    },
+    "osc_mappings": [],
+})
+
 def load_config():
     """Loads configuration from JSON file or creates a default one."""
+    # Don't lose edits still waiting to be written
+    flush_pending_save()
+
+    # Start from a private copy of the defaults so nested values are never
+    # shared
+    config = copy.deepcopy(dict(DEFAULT_CONFIG))
     try:
-        with open(CONFIG_FILE, "r") as f:
-            shared_state.config = json.load(f)
+        with open(CONFIG_FILE, "rb") as f:
+            config.update(orjson.loads(f.read()))
     except FileNotFoundError:
         print(f"WARNING: {CONFIG_FILE} not found. Creating a default config.")
-        shared_state.config = {
-            "osc_server_ip": "0.0.0.0",
-            "osc_server_port": 9000,
-            "rtp_midi_target_ip": "192.168.1.100",
-            "rtp_midi_target_port": 5004,
-            "midi_input_name": None,
-            "midi_output_name": None,
-            "osc_relay_mode": "zeroconf",  # NEW
-            "osc_broadcast_ip": "0.0.0.0",  # NEW
-            "osc_broadcast_port": 9000,     # NEW
-            "song_parser_settings": {
-                "column_name": "QUAD PATCH",
-                "scene_prefix": "SC ",
-                "footswitch_prefix": "FS ",
-                "osc_prefix": "/patch",
-            },
-            "osc_mappings": [],
-        }
+        shared_state.config = config
         save_config()
-    
-    # Ensure new settings exist for older configs
-    if "osc_relay_mode" not in shared_state.config:
-        shared_state.config["osc_relay_mode"] = "zeroconf"
-    if "osc_broadcast_ip" not in shared_state.config:
-        shared_state.config["osc_broadcast_ip"] = "0.0.0.0"
-    if "osc_broadcast_port" not in shared_state.config:
-        shared_state.config["osc_broadcast_port"] = 9000
+        return
+
+    shared_state.config = config
+    rebuild_mapping_index()
+    refresh_osc_settings()
 
 def save_config():
     """Saves the current config to the JSON file."""
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(shared_state.config, f, indent=2)
\ No newline at end of file
+    global _pending_save
+    with _save_lock:
+        if _pending_save is not None:
+            _pending_save.cancel()
+            _pending_save = None
+        # Every change to the mappings is saved, so this keeps the index
+        # current
+        rebuild_mapping_index()
+        refresh_osc_settings()
+        _write_config()
+
+def schedule_save():
+    """Applies a config change now and writes it to disk after SAVE_DELAY.
+
+    Edits made before the write happens are saved together with it.
+    """
+    global _pending_save
+    with _save_lock:
+        rebuild_mapping_index()
+        refresh_osc_settings()
+        if _pending_save is None:
+            _pending_save = threading.Timer(SAVE_DELAY, flush_pending_save)
+            _pending_save.daemon = True
+            _pending_save.start()
+
+def flush_pending_save():
+    """Writes the config now if a scheduled save is still waiting."""
+    global _pending_save
+    with _save_lock:
+        if _pending_save is None:
+            return
+        _pending_save.cancel()
+        _pending_save = None
+        _write_config()
+
+atexit.register(flush_pending_save)
+
+def _write_config():
+    """Writes shared_state.config to CONFIG_FILE. Hold _save_lock."""
+    # Write a temporary file and swap it in, so a crash mid-write can't
+    # leave a truncated config behind
+    tmp_file = CONFIG_FILE + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(orjson.dumps(shared_state.config, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_file, CONFIG_FILE)
+
+def _build_midi_message(midi_info):
+    """Builds the mido Message for one step of a mapping's MIDI sequence."""
+    msg_type = midi_info["type"]
+    channel = int(midi_info["channel"])
+
+    if msg_type == "program_change":
+        return Message(
+            "program_change",
+            channel=channel,
+            program=int(midi_info["program"]),
+        )
+    if msg_type == "control_change":
+        return Message(
+            "control_change",
+            channel=channel,
+            control=int(midi_info["control"]),
+            value=int(midi_info["value"]),
+        )
+    return None
+
+def _build_osc_bundle(osc_messages):
+    """Packs built OSC messages into a single OSC bundle."""
+    bundle = OscBundleBuilder(IMMEDIATELY)
+    for msg in osc_messages:
+        bundle.add_content(msg)
+    return bundle.build()
+
+def _prepare_mapping(mapping):
+    """Returns (mapping_type, sequence) with the sequence ready to send.
+
+    MIDI steps become mido Messages and OSC steps encoded OscMessages, so
+    the OSC handler does no parsing or encoding per message. Invalid steps
+    are skipped.
+    OSC mappings with "batch" set are prepared as one bundle ("osc_bundle").
+    """
+    mapping_type = mapping.get("mapping_type", "midi")
+    address = mapping.get("osc_address")
+
+    if mapping_type == "osc":
+        sequence = []
+        for osc_command in mapping.get("osc_sequence", []):
+            if not osc_command.get("address"):
+                continue
+            try:
+                sequence.append(
+                    build_message(
+                        osc_command["address"], osc_command.get("args", [])
+                    )
+                )
+            except Exception as e:
+                print(
+                    f"Error processing step in OSC sequence for {address}: "
+                    f"{e}"
+                )
+        if mapping.get("batch") and sequence:
+            return "osc_bundle", _build_osc_bundle(sequence)
+        return mapping_type, sequence
+
+    sequence = []
+    for midi_info in mapping.get("midi_sequence", []):
+        try:
+            msg = _build_midi_message(midi_info)
+        except Exception as e:
+            print(
+                f"Error processing step in MIDI sequence for {address}: {e}"
+            )
+            continue
+        if msg is not None:
+            sequence.append(msg)
+    return mapping_type, sequence
+
+def rebuild_mapping_index():
+    """Rebuilds the mapping indexes: prepared mappings by OSC address for the
+    OSC handler, and mappings by id for the mapping API."""
+    index = {}
+    by_id = {}
+    for mapping in shared_state.config.get("osc_mappings", []):
+        prepared = _prepare_mapping(mapping)
+        index.setdefault(mapping.get("osc_address"), []).append(prepared)
+        if mapping.get("id") is not None:
+            # Keep the first mapping of a repeated id, as a list scan would
+            by_id.setdefault(mapping["id"], mapping)
+    shared_state.osc_mapping_index = index
+    shared_state.mapping_by_id = by_id
+
+def refresh_osc_settings():
+    """Copies the OSC settings read per message into osc_settings."""
+    config = shared_state.config
+    shared_state.osc_settings = SimpleNamespace(
+        server_port=config.get("osc_server_port", 9000),
+        relay_mode=config.get("osc_relay_mode", "zeroconf"),
+        broadcast_ip=config.get("osc_broadcast_ip", "0.0.0.0"),
+        broadcast_port=config.get("osc_broadcast_port", 9000),
+    )
\ No newline at end of file
@@ -1,12 +1,24 @@
 import socket
+import functools
 import threading
-import time
+from concurrent.futures import ThreadPoolExecutor
 from zeroconf import ServiceInfo, Zeroconf, ServiceBrowser, ServiceListener
 import shared_state
-from pythonosc import udp_client
 
+# Resolves newly announced services off the zeroconf callback thread, so one
+# slow device doesn't hold up discovery of the others
+_resolver = ThreadPoolExecutor(max_workers=8, thread_name_prefix="zeroconf-resolve")
+
+_SERVICE_TYPE = "_stagebridge-api._tcp.local."
+_HOSTNAME_LOCAL = f"{socket.gethostname().lower()}.local."
+
+# Set to stop the discovery thread; Zeroconf does its work on its own threads
+_stop = threading.Event()
+_discovery_thread = None
+
+@functools.lru_cache(maxsize=1)
 def get_ip_address():
-    """Gets the primary IP address of the device."""
+    """Gets the primary IP address of the device. Cached for the process lifetime."""
     s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     try:
         s.connect(('10.255.255.255', 1))
@@ -17,10 +29,33 @@ def get_ip_address():
         s.close()
     return IP
 
+def _publish_devices():
+    """Rebuilds the device snapshot and JSON-safe list. Call with discovered_devices_lock held."""
+    shared_state.discovered_devices_snapshot = tuple(shared_state.discovered_devices.values())
+    shared_state.discovered_devices_public = [
+        {
+            'name': device_info['name'],
+            'host': device_info['host'],
+            'ip': device_info['ip'],
+            'port': device_info['port'],
+            'fqdn': device_info['fqdn']
+        }
+        for device_info in shared_state.discovered_devices.values()
+    ]
+
 class StageBridgeListener(ServiceListener):
     """Listens for other StageBridge devices on the network."""
     
     def add_service(self, zeroconf, type_, name):
+        _resolver.submit(self._resolve_and_register, zeroconf, type_, name)
+
+    def _resolve_and_register(self, zeroconf, type_, name):
+        try:
+            self._register_service(zeroconf, type_, name)
+        except Exception as e:
+            print(f"Error resolving StageBridge service {name}: {e}")
+
+    def _register_service(self, zeroconf, type_, name):
         info = zeroconf.get_service_info(type_, name, timeout=3000)
         if info:
             ip_address = None
@@ -40,17 +75,24 @@ class StageBridgeListener(ServiceListener):
                     'ip': ip_address,
                     'port': info.port,
                     'fqdn': info.server,
-                    'client': udp_client.SimpleUDPClient(ip_address, shared_state.config.get('osc_server_port', 8000))
+                    # Our own announcement is discovered too; flag it once here
+                    'is_local': ip_address == shared_state.our_ip
                 }
-                shared_state.discovered_devices[info.server] = device_info
+                with shared_state.discovered_devices_lock:
+                    shared_state.discovered_devices[info.server] = device_info
+                    _publish_devices()
                 print(f"Discovered StageBridge device: {device_info['name']} at {ip_address}:{info.port}")
     
     def remove_service(self, zeroconf, type_, name):
         info = zeroconf.get_service_info(type_, name)
         fqdn_to_remove = info.server if info else f"{name}.{type_}"
         
-        if fqdn_to_remove in shared_state.discovered_devices:
-            device_info = shared_state.discovered_devices.pop(fqdn_to_remove)
+        with shared_state.discovered_devices_lock:
+            device_info = shared_state.discovered_devices.pop(fqdn_to_remove, None)
+            if device_info is not None:
+                _publish_devices()
+
+        if device_info is not None:
             print(f"StageBridge device disconnected: {device_info['name']}")
         else:
             print(f"Device went away (not found in current list): {name}")
@@ -62,12 +104,12 @@ def start_discovery_service(port, device_name="StageBridge"):
     """Starts both Zeroconf service announcement and discovery in background threads."""
     
     def run_zeroconf():
-        ip_address = get_ip_address()
+        ip_address = shared_state.our_ip = get_ip_address()
         print(f"DEBUG: Our IP address is: {ip_address}")
         
         # Service announcement
-        instance_name = f"{device_name}._stagebridge-api._tcp.local."
-        service_type = "_stagebridge-api._tcp.local."
+        instance_name = device_name + "." + _SERVICE_TYPE
+        service_type = _SERVICE_TYPE
         
         service_info = ServiceInfo(
             type_=service_type,
@@ -75,7 +117,7 @@ def start_discovery_service(port, device_name="StageBridge"):
             addresses=[socket.inet_aton(ip_address)],
             port=port,
             properties={'name': device_name, 'version': '1.0'},
-            server=f"{socket.gethostname().lower()}.local."
+            server=_HOSTNAME_LOCAL
         )
         
         zeroconf = Zeroconf()
@@ -100,14 +142,22 @@ def start_discovery_service(port, device_name="StageBridge"):
         # debug_thread.start()
         
         try:
-            while True:
-                time.sleep(0.1)
+            _stop.wait()
         finally:
             print("Zeroconf: Unregistering service and stopping discovery.")
             browser.cancel()
             zeroconf.unregister_service(service_info)
             zeroconf.close()
 
-    discovery_thread = threading.Thread(target=run_zeroconf, daemon=True)
-    discovery_thread.start()
-    print("Zeroconf discovery service thread started.")
\ No newline at end of file
+    global _discovery_thread
+    _stop.clear()
+    _discovery_thread = threading.Thread(target=run_zeroconf, daemon=True)
+    _discovery_thread.start()
+    print("Zeroconf discovery service thread started.")
+
+def stop_discovery_service(timeout=5):
+    """Unregisters our service and stops discovery, waiting up to timeout
+    seconds for the discovery thread to finish."""
+    _stop.set()
+    if _discovery_thread is not None:
+        _discovery_thread.join(timeout)
\ No newline at end of file
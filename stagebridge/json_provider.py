@@ -0,0 +1,25 @@
+# json_provider.py
+# Routes Flask's jsonify() and request.get_json() through orjson.
+import orjson
+from flask.json.provider import JSONProvider
+
+# Keys are left in insertion order (Flask's JSON_SORT_KEYS off); sorting
+# them costs time on every response and no client relies on it
+_DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=_DUMPS_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's UTF-8 bytes straight to the response body
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=_DUMPS_OPTIONS), mimetype="application/json"
+        )
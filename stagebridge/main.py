@@ -15,7 +15,7 @@ from midi_handler import initialize_ports, start_midi_passthrough
 from osc_server import start_osc_server
 from web_server import create_app
 from client_web_server import create_client_app
-from discovery import start_discovery_service
+from discovery import start_discovery_service, stop_discovery_service
 
 # Import the Kivy GUI app
 from gui import StageBridgeApp
@@ -59,7 +59,7 @@ def restart_api_admin_service():
         # Start new server
         print(f"INFO: Starting new Flask API/Admin server on port {FLASK_API_PORT}")
         try:
-            global_api_admin_server = make_server("0.0.0.0", FLASK_API_PORT, global_api_admin_app)
+            global_api_admin_server = make_server("0.0.0.0", FLASK_API_PORT, global_api_admin_app, threaded=True)
             global_api_server_thread = threading.Thread(
                 target=global_api_admin_server.serve_forever, daemon=True
             )
@@ -104,7 +104,7 @@ def start_all_services():
 
     # Start API/Admin server
     print(f"Starting Flask API/Admin server on http://0.0.0.0:{FLASK_API_PORT}\n")
-    global_api_admin_server = make_server("0.0.0.0", FLASK_API_PORT, global_api_admin_app)
+    global_api_admin_server = make_server("0.0.0.0", FLASK_API_PORT, global_api_admin_app, threaded=True)
     global_api_server_thread = threading.Thread(
         target=global_api_admin_server.serve_forever, daemon=True
     )
@@ -114,7 +114,8 @@ def start_all_services():
     print(f"Starting Flask Client Frontend server on http://0.0.0.0:{FLASK_CLIENT_PORT}\n")
     client_server_thread = threading.Thread(
         target=lambda: client_frontend_app.run(
-            host="0.0.0.0", port=FLASK_CLIENT_PORT, debug=False, use_reloader=False
+            host="0.0.0.0", port=FLASK_CLIENT_PORT, debug=False, use_reloader=False,
+            threaded=True
         ),
         daemon=True
     )
@@ -137,4 +138,7 @@ if __name__ == "__main__":
     # Start all services in a background thread
     threading.Thread(target=start_all_services, daemon=True).start()
     # Run the Kivy GUI in the main thread
-    StageBridgeApp().run()
\ No newline at end of file
+    StageBridgeApp().run()
+    # The GUI has quit; withdraw our service so other devices drop us now
+    # instead of when its announcement expires
+    stop_discovery_service()
\ No newline at end of file
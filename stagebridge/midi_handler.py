@@ -1,9 +1,10 @@
 # midi_handler.py
-import threading
-import time
+import logging
 from mido import Message, get_input_names, get_output_names, open_input, open_output
 import shared_state
 
+logger = logging.getLogger(__name__)
+
 def initialize_ports():
     """Initializes all physical and network MIDI ports based on the config."""
     config = shared_state.config
@@ -33,23 +34,21 @@ def _send_rtp_midi(midi_message):
         return
     try:
         shared_state.rtp_midi_port.send(midi_message)
-        print(f"RTP-MIDI Sent: {midi_message}")
+        logger.debug("RTP-MIDI Sent: %s", midi_message)
     except Exception as e:
-        print(f"Error sending RTP-MIDI message: {e}")
+        logger.error("Error sending RTP-MIDI message: %s", e, exc_info=True)
+
+def _on_midi_input(msg):
+    """Called by mido from its own thread for each physical MIDI input message."""
+    logger.debug("MIDI In: %s -> Sending via RTP-MIDI", msg)
+    _send_rtp_midi(msg)
 
-def _midi_input_thread_func():
-    """The function that runs in a thread, listening for physical MIDI input."""
+def start_midi_passthrough():
+    """Starts forwarding physical MIDI input to the RTP-MIDI port."""
     print("Starting MIDI input listener...")
     if not shared_state.midi_in_port:
         print("MIDI Input not configured. RTP-MIDI passthrough is disabled.")
         return
-    while True:
-        for msg in shared_state.midi_in_port.iter_pending():
-            print(f"MIDI In: {msg} -> Sending via RTP-MIDI")
-            _send_rtp_midi(msg)
-        time.sleep(0.001)
-
-def start_midi_passthrough():
-    """Starts the MIDI passthrough thread."""
-    midi_thread = threading.Thread(target=_midi_input_thread_func, daemon=True)
-    midi_thread.start()
\ No newline at end of file
+    # The port's input thread delivers each message as it arrives, so there
+    # is no need to poll it; anything already queued is delivered first
+    shared_state.midi_in_port.callback = _on_midi_input
\ No newline at end of file
@@ -1,120 +1,240 @@
+import heapq
+import itertools
+import logging
+import socket
 import threading
 import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from pythonosc.dispatcher import Dispatcher
-from pythonosc.osc_server import ThreadingOSCUDPServer
-from pythonosc import udp_client
-from mido import Message
+from pythonosc.osc_server import BlockingOSCUDPServer
+from pythonosc.osc_message_builder import OscMessageBuilder
 import shared_state
 
-def _relay_to_discovered_devices(address, *args):
+# Per-message activity is logged at DEBUG so busy shows don't pay for it
+logger = logging.getLogger(__name__)
+
+# Number of OSC messages that can be handled at the same time
+OSC_HANDLER_WORKERS = 8
+# Number of received OSC messages that can wait for a free handler; beyond
+# this, new messages are dropped rather than queued without limit
+OSC_HANDLER_BACKLOG = 1024
+# Number of discovered devices a message can be relayed to at the same time
+OSC_RELAY_WORKERS = 16
+# Delay between the steps of a mapping's MIDI sequence, in seconds
+MIDI_STEP_DELAY = 0.01
+# Delay between the steps of a mapping's (unbatched) OSC sequence, in seconds
+OSC_STEP_DELAY = 0.01
+
+class PooledOSCUDPServer(BlockingOSCUDPServer):
+    """OSC UDP server that handles datagrams on a fixed pool of worker threads.
+
+    ThreadingOSCUDPServer starts a new thread for every datagram; this keeps
+    handlers concurrent without paying for a thread per message. The server
+    thread only receives and queues, so the socket keeps being drained while
+    handlers are busy.
+    """
+
+    def __init__(self, server_address, dispatcher, max_workers=OSC_HANDLER_WORKERS,
+                 backlog=OSC_HANDLER_BACKLOG):
+        super().__init__(server_address, dispatcher)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="osc-handler")
+        self._slots = threading.BoundedSemaphore(max_workers + backlog)
+
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            logger.warning("OSC handlers are backed up; dropping message from %s", client_address[0])
+            return
+        self._pool.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False)
+
+# One unconnected UDP socket sends all outgoing OSC, whatever the destination
+_tx_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+_tx_sock.setblocking(False)
+_tx_sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+
+def build_message(address, value):
+    """Builds an OscMessage, taking args the same way SimpleUDPClient.send_message does."""
+    builder = OscMessageBuilder(address=address)
+    if value is None:
+        pass
+    elif not isinstance(value, Iterable) or isinstance(value, (str, bytes)):
+        builder.add_arg(value)
+    else:
+        for arg in value:
+            builder.add_arg(arg)
+    return builder.build()
+
+def _send(content, ip, port):
+    """Sends a built OscMessage or OscBundle to ip:port."""
+    _tx_sock.sendto(content.dgram, (ip, port))
+
+_relay_pool = ThreadPoolExecutor(max_workers=OSC_RELAY_WORKERS, thread_name_prefix="osc-relay")
+
+def _relay_to_device(device_info, port, msg):
+    """Sends an already built OSC message to one discovered device."""
+    try:
+        _send(msg, device_info['ip'], port)
+        logger.debug("  -> Relayed to %s (%s)", device_info['name'], device_info['ip'])
+    except Exception as e:
+        logger.error("  -> Failed to relay to %s: %s", device_info['name'], e)
+
+def _relay_to_discovered_devices(address, args):
     """Relays OSC message to all discovered StageBridge devices."""
-    if not shared_state.discovered_devices:
-        print("No discovered devices to relay to")
+    devices = shared_state.discovered_devices_snapshot
+
+    if not devices:
+        logger.debug("No discovered devices to relay to")
         return
     
-    print(f"Relaying OSC message {address} {args} to {len(shared_state.discovered_devices)} devices")
+    logger.debug("Relaying OSC message %s %s to %d devices", address, args, len(devices))
     
-    for device_name, device_info in shared_state.discovered_devices.items():
-        try:
-            # Create client on-demand
-            client = udp_client.SimpleUDPClient(
-                device_info['ip'], 
-                shared_state.config.get('osc_server_port', 9000)
-            )
-            client.send_message(address, args)
-            print(f"  -> Relayed to {device_info['name']} ({device_info['ip']})")
-        except Exception as e:
-            print(f"  -> Failed to relay to {device_info['name']}: {e}")
+    # Build the message once for every device, then send to them in parallel
+    # so one slow device doesn't hold up the rest or the OSC handler
+    try:
+        msg = build_message(address, args)
+    except Exception as e:
+        logger.error("Failed to build OSC message %s %s for relaying: %s", address, args, e)
+        return
 
-def _relay_to_broadcast(address, *args):
+    port = shared_state.osc_settings.server_port
+    for device_info in devices:
+        if device_info['is_local']:
+            continue
+        _relay_pool.submit(_relay_to_device, device_info, port, msg)
+
+def _relay_to_broadcast(address, args):
     """Relays OSC message to broadcast address."""
-    broadcast_ip = shared_state.config.get('osc_broadcast_ip', '0.0.0.0')
-    broadcast_port = shared_state.config.get('osc_broadcast_port', 9000)
+    broadcast_ip = shared_state.osc_settings.broadcast_ip
+    broadcast_port = shared_state.osc_settings.broadcast_port
     
     try:
-        client = udp_client.SimpleUDPClient(broadcast_ip, broadcast_port)
-        client.send_message(address, args)
-        print(f"Relayed OSC message {address} {args} to {broadcast_ip}:{broadcast_port}")
+        _send(build_message(address, args), broadcast_ip, broadcast_port)
+        logger.debug("Relayed OSC message %s %s to %s:%s", address, args, broadcast_ip, broadcast_port)
     except Exception as e:
-        print(f"Failed to relay to broadcast address {broadcast_ip}:{broadcast_port}: {e}")
+        logger.error("Failed to relay to broadcast address %s:%s: %s", broadcast_ip, broadcast_port, e)
 
 def _send_local_osc_sequence(osc_sequence):
-    """Sends a sequence of OSC messages locally."""
-    local_port = shared_state.config.get('osc_server_port', 9000)
+    """Sends a sequence of prebuilt OSC messages locally."""
+    local_port = shared_state.osc_settings.server_port
     
     try:
-        # Create a client to send to ourselves (localhost)
-        local_client = udp_client.SimpleUDPClient('127.0.0.1', local_port)
-        
-        for osc_command in osc_sequence:
-            address = osc_command.get('address')
-            args = osc_command.get('args', [])
-            
-            if address:
-                print(f"  -> Sending local OSC: {address} {args}")
-                local_client.send_message(address, args)
-                time.sleep(0.01)  # Small delay between commands
+        # Send to ourselves (localhost), spacing the steps against a fixed
+        # start time so send overhead doesn't stretch the sequence
+        start = time.monotonic()
+        for i, msg in enumerate(osc_sequence):
+            delay = start + OSC_STEP_DELAY * i - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            logger.debug("  -> Sending local OSC: %s %s", msg.address, msg.params)
+            _send(msg, '127.0.0.1', local_port)
                 
     except Exception as e:
-        print(f"Error sending local OSC sequence: {e}")
+        logger.error("Error sending local OSC sequence: %s", e, exc_info=True)
+
+def _send_local_osc_bundle(bundle):
+    """Sends a prebuilt OSC bundle locally in a single datagram."""
+    local_port = shared_state.osc_settings.server_port
+    
+    try:
+        logger.debug("  -> Sending local OSC bundle (%d messages)", bundle.num_contents)
+        _send(bundle, '127.0.0.1', local_port)
+    except Exception as e:
+        logger.error("Error sending local OSC bundle: %s", e, exc_info=True)
+
+# Pending MIDI sends as (due time, tiebreak, osc address, message), sent by
+# _midi_sender so handlers don't sleep between the steps of a sequence
+_midi_schedule = []
+_midi_schedule_cond = threading.Condition()
+_midi_schedule_counter = itertools.count()
+# Time after which the last scheduled sequence has finished, so the next one
+# starts after it instead of interleaving its steps with it
+_midi_next_free = 0.0
+
+def _schedule_midi_sequence(address, sequence):
+    """Queues a MIDI sequence to be sent one step every MIDI_STEP_DELAY,
+    after any sequence already queued."""
+    global _midi_next_free
+    with _midi_schedule_cond:
+        base = max(time.monotonic(), _midi_next_free)
+        _midi_next_free = base + MIDI_STEP_DELAY * len(sequence)
+        for i, msg in enumerate(sequence):
+            heapq.heappush(
+                _midi_schedule,
+                (base + MIDI_STEP_DELAY * i, next(_midi_schedule_counter), address, msg),
+            )
+        _midi_schedule_cond.notify()
+
+def _midi_sender():
+    """Sends scheduled MIDI messages to the output port as they fall due."""
+    while True:
+        with _midi_schedule_cond:
+            while not _midi_schedule or _midi_schedule[0][0] > time.monotonic():
+                timeout = _midi_schedule[0][0] - time.monotonic() if _midi_schedule else None
+                _midi_schedule_cond.wait(timeout)
+            _, _, address, msg = heapq.heappop(_midi_schedule)
+
+        try:
+            logger.debug("  -> Sending MIDI: %s", msg)
+            with shared_state.midi_out_lock:
+                shared_state.midi_out_port.send(msg)
+        except Exception as e:
+            logger.error("Error processing step in MIDI sequence for %s: %s", address, e, exc_info=True)
 
 def _osc_handler(address, *args):
     """Handles incoming OSC messages and translates them to MIDI or OSC."""
-    print(f"OSC Received: {address} {args}")
+    logger.debug("OSC Received: %s %s", address, args)
     
     # Check for predefined mappings first
-    mapping_found = False
-    for mapping in shared_state.config.get("osc_mappings", []):
-        if mapping["osc_address"] == address:
-            mapping_found = True
-            mapping_type = mapping.get("mapping_type", "midi")
-            
-            if mapping_type == "osc":
-                # Handle OSC-to-OSC mapping
-                osc_sequence = mapping.get("osc_sequence", [])
-                if osc_sequence:
-                    print(f"Found OSC mapping for {address}. Sending OSC sequence...")
-                    _send_local_osc_sequence(osc_sequence)
-                    
-            else:
-                # Handle OSC-to-MIDI mapping (existing code)
-                if not shared_state.midi_out_port:
-                    print("Warning: MIDI output port not configured or open.")
-                    continue
-                
-                midi_sequence = mapping.get("midi_sequence", [])
-                if not midi_sequence: 
-                    continue
+    mappings = shared_state.osc_mapping_index.get(address, ())
+    mapping_found = bool(mappings)
+    for mapping_type, sequence in mappings:
+        if mapping_type == "osc":
+            # Handle OSC-to-OSC mapping
+            if sequence:
+                logger.debug("Found OSC mapping for %s. Sending OSC sequence...", address)
+                _send_local_osc_sequence(sequence)
                 
-                print(f"Found MIDI mapping for {address}. Sending MIDI sequence...")
-                for midi_info in midi_sequence:
-                    try:
-                        msg_type = midi_info["type"]
-                        channel = int(midi_info["channel"])
-                        
-                        if msg_type == "program_change":
-                            msg = Message("program_change", channel=channel, program=int(midi_info["program"]))
-                        elif msg_type == "control_change":
-                            msg = Message("control_change", channel=channel, control=int(midi_info["control"]), value=int(midi_info["value"]))
-                        else: 
-                            continue
-                        
-                        print(f"  -> Sending MIDI: {msg}")
-                        shared_state.midi_out_port.send(msg)
-                        time.sleep(0.01)
-                    except Exception as e:
-                        print(f"Error processing step in MIDI sequence for {address}: {e}")
-    
+        elif mapping_type == "osc_bundle":
+            # OSC-to-OSC mapping marked "batch": no delay between its messages
+            logger.debug("Found batched OSC mapping for %s. Sending OSC bundle...", address)
+            _send_local_osc_bundle(sequence)
+            
+        else:
+            # Handle OSC-to-MIDI mapping (existing code)
+            if not shared_state.midi_out_port:
+                logger.warning("MIDI output port not configured or open.")
+                continue
+            
+            if not sequence: 
+                continue
+            
+            # Messages were built from the mapping when the config was loaded
+            logger.debug("Found MIDI mapping for %s. Sending MIDI sequence...", address)
+            _schedule_midi_sequence(address, sequence)
+
     # If no mapping found, relay based on mode
     if not mapping_found:
-        relay_mode = shared_state.config.get('osc_relay_mode', 'zeroconf')
+        relay_mode = shared_state.osc_settings.relay_mode
         
         if relay_mode == 'broadcast':
-            print(f"No mapping found for {address}, relaying to broadcast address")
-            _relay_to_broadcast(address, *args)
+            logger.debug("No mapping found for %s, relaying to broadcast address", address)
+            _relay_to_broadcast(address, args)
         else:  # zeroconf mode
-            print(f"No mapping found for {address}, relaying to discovered devices")
-            _relay_to_discovered_devices(address, *args)
+            logger.debug("No mapping found for %s, relaying to discovered devices", address)
+            _relay_to_discovered_devices(address, args)
 
 def start_osc_server():
     """Starts the OSC server in a background thread."""
@@ -122,10 +242,12 @@ def start_osc_server():
     dispatcher = Dispatcher()
     dispatcher.set_default_handler(_osc_handler)
     
-    osc_server = ThreadingOSCUDPServer(
+    osc_server = PooledOSCUDPServer(
         (config["osc_server_ip"], config["osc_server_port"]), dispatcher
     )
     
+    threading.Thread(target=_midi_sender, daemon=True).start()
+
     osc_thread = threading.Thread(target=osc_server.serve_forever, daemon=True)
     osc_thread.start()
     print(f"OSC Server listening on {osc_server.server_address}")
\ No newline at end of file
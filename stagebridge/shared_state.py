@@ -1,14 +1,47 @@
 # shared_state.py
 # This module holds the shared state of the application,
 # allowing different components to access the same data and objects.
+import threading
+from types import SimpleNamespace
 
 # The main configuration dictionary, loaded from config.json
 config = {}
+# Held by API requests that change config, so concurrent edits (e.g. an
+# append racing a list replacement) apply one at a time
+config_lock = threading.Lock()
 
 # Mido port objects
 midi_in_port = None
 midi_out_port = None
 rtp_midi_port = None
+# Serializes sends to midi_out_port from concurrent OSC handler threads
+midi_out_lock = threading.Lock()
+
+# OSC address -> list of (mapping_type, prepared sequence) for its mappings,
+# rebuilt whenever the config is loaded or saved
+osc_mapping_index = {}
+# Mapping id -> mapping dict in config["osc_mappings"], rebuilt alongside it
+mapping_by_id = {}
+
+# OSC settings read for every message, copied out of config whenever it is
+# loaded or saved
+osc_settings = SimpleNamespace(
+    server_port=9000,
+    relay_mode="zeroconf",
+    broadcast_ip="0.0.0.0",
+    broadcast_port=9000,
+)
+
+# Our primary IP address, resolved once when discovery starts
+our_ip = None
 
 # Dictionary to store discovered StageBridge devices
-discovered_devices = {} 
\ No newline at end of file
+discovered_devices = {}
+# Copy of discovered_devices for the fleet API, rebuilt on add/remove
+discovered_devices_public = []
+# Tuple of the discovered device dicts, replaced on add/remove so readers
+# can iterate it without taking the lock
+discovered_devices_snapshot = ()
+# Guards discovered_devices (and rebuilding its views); discovery updates it
+# from resolver threads
+discovered_devices_lock = threading.Lock()
\ No newline at end of file
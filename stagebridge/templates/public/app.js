@@ -365,6 +365,7 @@ document.addEventListener("DOMContentLoaded", () => {
 
       mappingData.description = description;
       mappingData.osc_sequence = oscCommands;
+      mappingData.batch = document.getElementById('osc-batch').checked;
 
     } else {
       // Handle OSC-to-MIDI mapping
@@ -560,6 +561,7 @@ document.addEventListener("DOMContentLoaded", () => {
       oscMappingSection.classList.remove('hidden');
 
       document.getElementById('osc-description').value = mapping.description || '';
+      document.getElementById('osc-batch').checked = Boolean(mapping.batch);
 
       // Populate OSC commands
       oscCommandsContainer.innerHTML = '';
@@ -1,7 +1,10 @@
 import os
 import json
+import functools
+import gzip
 import uuid
 import socket
+import time
 from flask import (
     Flask,
     jsonify,
@@ -11,25 +14,77 @@ from flask import (
     send_from_directory,
 )
 from flask_cors import CORS
+import orjson
 from werkzeug.utils import secure_filename
 from mido import get_input_names, get_output_names
 
 import shared_state
 import config_manager
+from json_provider import OrjsonProvider
 from song_parser import parse_song_csv
 
 STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
 TEMPLATE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
 
+# Seconds a listing of the system's MIDI ports is reused for by /api/midi-ports
+MIDI_PORTS_CACHE_TTL = 2.0
+# Seconds the address found by /api/system/ip is reused for
+SYSTEM_IP_CACHE_TTL = 60.0
+# JSON API responses at least this many bytes are gzipped for clients that
+# accept it; smaller ones aren't worth compressing
+GZIP_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+
+def _with_config_lock(view):
+    """Runs a view while holding shared_state.config_lock."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        with shared_state.config_lock:
+            return view(*args, **kwargs)
+    return wrapper
+
 def create_app(restart_callback):
     app = Flask(__name__, static_folder=STATIC_FOLDER, template_folder=TEMPLATE_FOLDER)
+    app.json = OrjsonProvider(app)
     CORS(app)
 
+    # Cached /api/midi-ports response; a restart creates a new app, clearing it
+    midi_ports_cache = {"data": None, "expires": 0.0}
+    # Cached /api/system/ip address, likewise cleared by a restart
+    system_ip_cache = {"ip": None, "expires": 0.0}
+
+    @app.after_request
+    def finish_api_response(response):
+        if (
+            request.method == "GET"
+            and request.path.startswith("/api/")
+            and response.status_code == 200
+            and response.mimetype == "application/json"
+            and not response.direct_passthrough
+        ):
+            # The config grows with every mapping and compresses well
+            response.vary.add("Accept-Encoding")
+            if (
+                response.content_length >= GZIP_MIN_SIZE
+                and "gzip" in request.accept_encodings
+            ):
+                response.set_data(
+                    gzip.compress(response.get_data(), GZIP_LEVEL, mtime=0)
+                )
+                response.headers["Content-Encoding"] = "gzip"
+            # Have clients revalidate every time, and let those polling the
+            # API get a 304 while the data is unchanged
+            response.cache_control.no_cache = True
+            response.add_etag()
+            response.make_conditional(request)
+        return response
+
     @app.route("/")
     def serve_index():
         return send_from_directory(app.static_folder, "index.html")
 
     @app.route("/admin", methods=["GET", "POST"])
+    @_with_config_lock
     def admin_page():
         if request.method == "POST":
             shared_state.config["osc_server_port"] = int(
@@ -72,19 +127,38 @@ def create_app(restart_callback):
 
     @app.route("/api/midi-ports", methods=["GET"])
     def get_midi_ports_api():
-        return jsonify({"inputs": get_input_names(), "outputs": get_output_names()})
+        # Enumerating ports goes through the MIDI backend, so don't redo it
+        # for every poll from the admin page
+        now = time.monotonic()
+        if now >= midi_ports_cache["expires"]:
+            midi_ports_cache["data"] = {"inputs": get_input_names(), "outputs": get_output_names()}
+            midi_ports_cache["expires"] = now + MIDI_PORTS_CACHE_TTL
+        return jsonify(midi_ports_cache["data"])
 
     @app.route("/api/config", methods=["GET", "PUT"])
+    @_with_config_lock
     def manage_config():
         if request.method == "GET":
             return jsonify(shared_state.config)
         elif request.method == "PUT":
             shared_state.config.update(request.json)
-            config_manager.save_config()
+            config_manager.schedule_save()
             return jsonify({"message": "Config updated."})
         
+    @app.route("/api/config/apply-and-restart", methods=["POST"])
+    @_with_config_lock
+    def apply_config_and_restart():
+        """Merges the given fields into the config, saves it and restarts."""
+        shared_state.config.update(request.json)
+        config_manager.save_config()
+        restart_callback()
+        return jsonify({"message": "Config updated. Server is restarting..."})
+
     @app.route("/api/system/ip", methods=["GET"])
     def get_system_ip():
+        now = time.monotonic()
+        if now < system_ip_cache["expires"]:
+            return jsonify({"ip_address": system_ip_cache["ip"]})
         try:
             # Get hostname and resolve to IP
             hostname = socket.gethostname()
@@ -93,17 +167,17 @@ def create_app(restart_callback):
             # If it returns loopback, try alternative method
             if local_ip.startswith('127.'):
                 # Try to get IP from network interfaces
-                s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                s.settimeout(0)
-                try:
-                    # Connect to a reserved IP that won't actually send data
-                    s.connect(('10.254.254.254', 1))
-                    local_ip = s.getsockname()[0]
-                except:
-                    local_ip = '127.0.0.1'
-                finally:
-                    s.close()
+                with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                    s.settimeout(0)
+                    try:
+                        # Connect to a reserved IP that won't actually send data
+                        s.connect(('10.254.254.254', 1))
+                        local_ip = s.getsockname()[0]
+                    except OSError:
+                        local_ip = '127.0.0.1'
             
+            system_ip_cache["ip"] = local_ip
+            system_ip_cache["expires"] = now + SYSTEM_IP_CACHE_TTL
             return jsonify({"ip_address": local_ip})
         
         except Exception as e:
@@ -114,11 +188,13 @@ def create_app(restart_callback):
 
     @app.route("/api/config/download", methods=["GET"])
     def download_config():
+        config_manager.flush_pending_save()
         return send_file(
             config_manager.CONFIG_FILE, as_attachment=True, download_name="config.json"
         )
 
     @app.route("/api/config/upload", methods=["POST"])
+    @_with_config_lock
     def upload_config():
         if "file" not in request.files:
             return jsonify({"error": "No file part"}), 400
@@ -127,10 +203,13 @@ def create_app(restart_callback):
             return jsonify({"error": "No file selected"}), 400
         if file and file.filename.endswith(".json"):
             try:
-                new_config_data = json.load(file)
-                file.seek(0)
-                with open(config_manager.CONFIG_FILE, "w") as f:
-                    json.dump(new_config_data, f, indent=2)
+                # Parse only to validate; the uploaded bytes are written as-is
+                raw = file.read()
+                orjson.loads(raw)
+                # Write out pending edits first so they can't overwrite the upload
+                config_manager.flush_pending_save()
+                with open(config_manager.CONFIG_FILE, "wb") as f:
+                    f.write(raw)
                 config_manager.load_config()
                 return jsonify({"message": "Configuration uploaded successfully."})
             except Exception as e:
@@ -138,6 +217,7 @@ def create_app(restart_callback):
         return jsonify({"error": "Invalid file type"}), 400
 
     @app.route("/api/songs/upload", methods=["POST"])
+    @_with_config_lock
     def upload_song_csv():
         if "file" not in request.files:
             return jsonify({"error": "No file part"}), 400
@@ -157,7 +237,7 @@ def create_app(restart_callback):
             if not new_mappings:
                 return jsonify({"message": "No new mappings generated."}), 200
             shared_state.config["osc_mappings"].extend(new_mappings)
-            config_manager.save_config()
+            config_manager.schedule_save()
             return jsonify(
                 {
                     "message": f"Successfully added {len(new_mappings)} mappings for '{song_title}'."
@@ -167,12 +247,13 @@ def create_app(restart_callback):
             return jsonify({"error": f"An error occurred during parsing: {e}"}), 500
 
     @app.route("/api/mappings", methods=["POST", "DELETE"])
+    @_with_config_lock
     def manage_mappings_plural():
         if request.method == "POST":
             mapping = request.json
             mapping["id"] = uuid.uuid4().hex
             shared_state.config["osc_mappings"].append(mapping)
-            config_manager.save_config()
+            config_manager.schedule_save()
             return jsonify(mapping), 201
         elif request.method == "DELETE":
             data = request.get_json()
@@ -184,34 +265,90 @@ def create_app(restart_callback):
                     400,
                 )
             ids_to_delete = set(data["ids"])
-            current_mappings = shared_state.config["osc_mappings"]
-            updated_mappings = [
-                m for m in current_mappings if m.get("id") not in ids_to_delete
-            ]
-            shared_state.config["osc_mappings"] = updated_mappings
-            config_manager.save_config()
+            # Only walk the mappings when the index says something matches
+            found_ids = ids_to_delete & shared_state.mapping_by_id.keys()
+            if found_ids:
+                current_mappings = shared_state.config["osc_mappings"]
+                updated_mappings = [
+                    m for m in current_mappings if m.get("id") not in found_ids
+                ]
+                shared_state.config["osc_mappings"] = updated_mappings
+                config_manager.schedule_save()
             return jsonify(
                 {"message": f"{len(ids_to_delete)} mappings deleted successfully."}
             )
 
     @app.route("/api/mappings/<mapping_id>", methods=["PUT", "DELETE"])
+    @_with_config_lock
     def manage_mapping(mapping_id):
-        mappings = shared_state.config["osc_mappings"]
-        mapping_found = next((m for m in mappings if m["id"] == mapping_id), None)
+        mapping_found = shared_state.mapping_by_id.get(mapping_id)
         if not mapping_found:
             return jsonify({"error": "Mapping not found"}), 404
         if request.method == "PUT":
             mapping_found.update(request.json)
-            config_manager.save_config()
+            config_manager.schedule_save()
             return jsonify(mapping_found)
         elif request.method == "DELETE":
+            # An uploaded file can repeat an id, so drop every mapping with it
             shared_state.config["osc_mappings"] = [
-                m for m in mappings if m["id"] != mapping_id
+                m
+                for m in shared_state.config["osc_mappings"]
+                if m.get("id") != mapping_id
             ]
-            config_manager.save_config()
+            config_manager.schedule_save()
             return jsonify({"message": "Mapping deleted"}), 200
 
+    @app.route("/api/mappings/batch", methods=["POST"])
+    @_with_config_lock
+    def batch_mappings():
+        """Applies a list of add/put/delete operations with a single save."""
+        ops = request.get_json()
+        if not isinstance(ops, list):
+            return jsonify({"error": "Expected a JSON array of operations"}), 400
+        mappings = shared_state.config["osc_mappings"]
+        # The shared index is only rebuilt on save, so track this batch's
+        # changes in a copy of it
+        by_id = dict(shared_state.mapping_by_id)
+        results = []
+        changed = False
+        for op in ops:
+            if not isinstance(op, dict):
+                results.append({"status": "error", "error": "Invalid operation"})
+                continue
+            kind, mapping_id = op.get("op"), op.get("id")
+            if kind == "add":
+                mapping = op.get("mapping")
+                if not isinstance(mapping, dict):
+                    results.append({"op": kind, "status": "error", "error": "Missing mapping"})
+                    continue
+                mapping["id"] = uuid.uuid4().hex
+                mappings.append(mapping)
+                by_id[mapping["id"]] = mapping
+                results.append({"op": kind, "id": mapping["id"], "status": "ok"})
+            elif kind in ("put", "delete"):
+                mapping_found = by_id.get(mapping_id)
+                if not mapping_found:
+                    results.append({"op": kind, "id": mapping_id, "status": "error", "error": "Mapping not found"})
+                    continue
+                if kind == "put":
+                    if not isinstance(op.get("mapping"), dict):
+                        results.append({"op": kind, "id": mapping_id, "status": "error", "error": "Missing mapping"})
+                        continue
+                    mapping_found.update(op["mapping"])
+                else:
+                    del by_id[mapping_id]
+                    mappings[:] = [m for m in mappings if m.get("id") != mapping_id]
+                results.append({"op": kind, "id": mapping_found["id"], "status": "ok"})
+            else:
+                results.append({"op": kind, "status": "error", "error": "Unknown operation"})
+                continue
+            changed = True
+        if changed:
+            config_manager.schedule_save()
+        return jsonify(results)
+
     @app.route("/api/mappings/upload-json", methods=["POST"])
+    @_with_config_lock
     def upload_json_mappings():
         if not request.is_json:
             return jsonify({"error": "Request must be JSON"}), 400
@@ -234,13 +371,12 @@ def create_app(restart_callback):
                 if "id" not in new_mapping or not isinstance(new_mapping["id"], str):
                     new_mapping["id"] = uuid.uuid4().hex
                 if osc_address in current_mappings_dict:
-                    current_mappings_dict[osc_address] = new_mapping
                     updated_count += 1
                 else:
-                    current_mappings_dict[osc_address] = new_mapping
                     added_count += 1
+                current_mappings_dict[osc_address] = new_mapping
             shared_state.config["osc_mappings"] = list(current_mappings_dict.values())
-            config_manager.save_config()
+            config_manager.schedule_save()
             return jsonify(
                 {
                     "message": f"Mappings uploaded successfully. Added: {added_count}, Updated: {updated_count}.",